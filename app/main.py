@@ -8,28 +8,153 @@ including the Spotify client, track selector, and playlist manager.
 
 import os
 import sys
+import queue
+import atexit
+import asyncio
 import logging
+import logging.handlers
 import signal
-import yaml
-from typing import Dict, Any, Optional
-from dotenv import load_dotenv
+import threading
+from functools import lru_cache
+from typing import TYPE_CHECKING, Callable, Dict, Any, Optional, Tuple
 
-from .spotify_client import SpotifyClient
-from .track_selector_enhanced import EnhancedTrackSelector as TrackSelector
-from .playlist_manager import PlaylistManager
+# Heavy components are imported lazily in initialize() so that importing this
+# module (CLI help, manual updates, tests) doesn't pay for their dependencies.
+if TYPE_CHECKING:
+    from .spotify_client import SpotifyClient
+    from .track_selector import TrackSelector
+    from .playlist_manager import PlaylistManager
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('/app/logs/spotify_bot.log'),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+
+def _configure_logging() -> None:
+    """
+    Configure root logging with a queue in front of the real handlers.
+    
+    Callers only enqueue records; a background QueueListener formats them and
+    does the file/console I/O, so logging never blocks scheduler threads.
+    The log file rotates at 10 MB.
+    Like logging.basicConfig, this does nothing if the root logger already
+    has handlers.
+    """
+    root = logging.getLogger()
+    if root.handlers:
+        return
+    
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    file_handler = logging.handlers.RotatingFileHandler(
+        '/app/logs/spotify_bot.log',
+        maxBytes=10 * 1024 * 1024,
+        backupCount=5
+    )
+    console_handler = logging.StreamHandler(sys.stdout)
+    handlers = [file_handler, console_handler]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    root.setLevel(logging.INFO)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+
+_configure_logging()
 
 logger = logging.getLogger(__name__)
 
+# Parsed configuration keyed by (path, mtime_ns, size); an edited file gets a
+# new key, so the YAML is only re-parsed when it actually changes.
+_CONFIG_CACHE: Dict[Tuple[str, int, int], Dict[str, Any]] = {}
+
+# Environment variables the bot cannot start without
+_REQUIRED_ENV = frozenset({
+    'SPOTIFY_CLIENT_ID',
+    'SPOTIFY_CLIENT_SECRET',
+    'SPOTIFY_REFRESH_TOKEN',
+    'SPOTIFY_USER_ID'
+})
+
+# Playlist types accepted by run_manual_update()
+_VALID_PLAYLIST_TYPES = frozenset({'daily', 'weekly', 'monthly', 'yearly'})
+
+# Settings read with [] (not .get) by the playlist manager
+_REQUIRED_SECTIONS = {
+    'app': ('snapshot_dir',),
+    'persona': ('name', 'prefix'),
+}
+
+
+def _validate_config(config: Any) -> None:
+    """
+    Check that a parsed configuration has the settings the bot relies on.
+    
+    Runs once per loaded file, so a broken config fails at startup rather
+    than when a scheduled update first touches the missing key.
+    
+    Args:
+        config: Parsed YAML document
+        
+    Raises:
+        ValueError: If required settings are missing or malformed
+    """
+    if not isinstance(config, dict):
+        raise ValueError("Configuration must be a mapping")
+    
+    errors = []
+    for section, keys in _REQUIRED_SECTIONS.items():
+        values = config.get(section)
+        if not isinstance(values, dict):
+            errors.append(f"'{section}' section is missing")
+            continue
+        errors.extend(f"'{section}.{key}' is required" for key in keys if key not in values)
+    
+    playlists = config.get('playlists')
+    if not isinstance(playlists, dict) or not playlists:
+        errors.append("'playlists' section is missing or empty")
+    else:
+        for playlist_type, playlist_config in playlists.items():
+            if not isinstance(playlist_config, dict):
+                errors.append(f"'playlists.{playlist_type}' must be a mapping")
+            elif playlist_config.get('active', True) and \
+                    not isinstance(playlist_config.get('schedule_cron'), str):
+                errors.append(f"'playlists.{playlist_type}.schedule_cron' is required")
+    
+    if errors:
+        raise ValueError(f"Invalid configuration: {'; '.join(errors)}")
+
+
+# Event loop that currently owns the SIGTERM/SIGINT handlers
+_signal_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _install_signal_handlers(loop: asyncio.AbstractEventLoop,
+                             handler: Callable[[int], None]) -> bool:
+    """
+    Install SIGTERM/SIGINT handlers on an event loop, at most once per loop.
+    
+    Signals can only be handled on the main thread, so this is a no-op
+    elsewhere.
+    
+    Args:
+        loop: Event loop that should receive the signals
+        handler: Callback invoked with the signal number
+        
+    Returns:
+        True if the loop has the handlers installed, False otherwise
+    """
+    global _signal_loop
+    if threading.current_thread() is not threading.main_thread():
+        return False
+    if _signal_loop is loop:
+        return True
+    
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, handler, signum)
+    _signal_loop = loop
+    return True
+
 
 class SpotifyBot:
     """
@@ -39,6 +164,17 @@ class SpotifyBot:
     and graceful shutdown handling.
     """
     
+    __slots__ = (
+        'config_path',
+        'config',
+        'spotify_client',
+        'track_selector',
+        'playlist_manager',
+        'running',
+        '_loop',
+        '_stop_event',
+    )
+    
     def __init__(self, config_path: str = "/app/config/config.yaml") -> None:
         """
         Initialize the bot with configuration.
@@ -49,16 +185,22 @@ class SpotifyBot:
         Raises:
             ValueError: If required environment variables are missing
             FileNotFoundError: If configuration file cannot be loaded
+            ValueError: If the configuration is missing required settings
         """
         self.config_path = config_path
         self.config = self._load_config()
-        self.spotify_client: Optional[SpotifyClient] = None
-        self.track_selector: Optional[TrackSelector] = None
-        self.playlist_manager: Optional[PlaylistManager] = None
+        self.spotify_client: Optional["SpotifyClient"] = None
+        self.track_selector: Optional["TrackSelector"] = None
+        self.playlist_manager: Optional["PlaylistManager"] = None
         self.running = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop_event: Optional[asyncio.Event] = None
         
-        # Load environment variables
-        load_dotenv()
+        # Load environment variables from ./.env unless the environment
+        # (e.g. the container orchestrator) already provides them
+        if not os.getenv('SPOTIFY_CLIENT_ID') and os.path.exists('.env'):
+            from dotenv import load_dotenv
+            load_dotenv('.env', override=False)
         
         # Validate environment
         self._validate_environment()
@@ -73,20 +215,38 @@ class SpotifyBot:
         Raises:
             FileNotFoundError: If config file doesn't exist
             yaml.YAMLError: If config file is invalid YAML
+            ValueError: If required settings are missing
         """
+        import yaml
+
         try:
-            with open(self.config_path, 'r', encoding='utf-8') as f:
-                config = yaml.safe_load(f)
-            logger.info(f"Loaded configuration from {self.config_path}")
+            st = os.stat(self.config_path)
+            cache_key = (self.config_path, st.st_mtime_ns, st.st_size)
+            if cache_key in _CONFIG_CACHE:
+                return _CONFIG_CACHE[cache_key]
+
+            # Prefer the libyaml-backed loader; SafeLoader is the pure-Python
+            # fallback when PyYAML was built without libyaml. The file is read
+            # as bytes so the parser decodes it directly (a UTF-8 BOM is
+            # detected by the loader).
+            loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+            with open(self.config_path, 'rb') as f:
+                config = yaml.load(f, Loader=loader)
+            _validate_config(config)
+            _CONFIG_CACHE[cache_key] = config
+            logger.info("Loaded configuration from %s", self.config_path)
             return config
         except FileNotFoundError:
-            logger.error(f"Configuration file not found: {self.config_path}")
+            logger.error("Configuration file not found: %s", self.config_path)
             raise
         except yaml.YAMLError as e:
-            logger.error(f"Invalid YAML in configuration file: {e}")
+            logger.error("Invalid YAML in configuration file: %s", e)
             raise
-        except Exception as e:
-            logger.error(f"Failed to load configuration: {e}")
+        except ValueError as e:
+            logger.error("%s", e)
+            raise
+        except Exception:
+            logger.exception("Failed to load configuration")
             raise
     
     def _validate_environment(self) -> None:
@@ -96,22 +256,12 @@ class SpotifyBot:
         Raises:
             ValueError: If required environment variables are missing
         """
-        required_vars = [
-            'SPOTIFY_CLIENT_ID',
-            'SPOTIFY_CLIENT_SECRET', 
-            'SPOTIFY_REFRESH_TOKEN',
-            'SPOTIFY_USER_ID'
-        ]
-        
-        missing_vars = []
-        for var in required_vars:
-            if not os.getenv(var):
-                missing_vars.append(var)
+        # Empty values count as missing, as they would fail authentication
+        missing_vars = sorted(var for var in _REQUIRED_ENV if not os.environ.get(var))
         
         if missing_vars:
-            error_msg = f"Missing required environment variables: {missing_vars}"
-            logger.error(error_msg)
-            raise ValueError(error_msg)
+            logger.error("Missing required environment variables: %s", missing_vars)
+            raise ValueError(f"Missing required environment variables: {missing_vars}")
         
         logger.info("Environment validation passed")
     
@@ -120,7 +270,8 @@ class SpotifyBot:
         Initialize all components.
         
         This method sets up the Spotify client, track selector, and playlist manager.
-        It also tests the Spotify connection to ensure credentials are valid.
+        The connection itself is verified by the first real API call rather than
+        a separate test request.
         
         Raises:
             Exception: If any component fails to initialize
@@ -129,17 +280,15 @@ class SpotifyBot:
             logger.info("Initializing Spotify App Agent...")
             
             # Initialize Spotify client
+            from .spotify_client import SpotifyClient
             self.spotify_client = SpotifyClient()
             
-            # Test Spotify connection
-            user_profile = self.spotify_client.get_user_profile()
-            display_name = user_profile.get('display_name', 'Unknown')
-            logger.info(f"Connected to Spotify as: {display_name}")
-            
             # Initialize track selector
+            from .track_selector import TrackSelector
             self.track_selector = TrackSelector(self.spotify_client, self.config)
             
             # Initialize playlist manager
+            from .playlist_manager import PlaylistManager
             self.playlist_manager = PlaylistManager(
                 self.spotify_client, 
                 self.track_selector, 
@@ -148,8 +297,8 @@ class SpotifyBot:
             
             logger.info("Bot initialization completed successfully")
             
-        except Exception as e:
-            logger.error(f"Failed to initialize bot: {e}")
+        except Exception:
+            logger.exception("Failed to initialize bot")
             raise
     
     def start(self) -> None:
@@ -160,19 +309,20 @@ class SpotifyBot:
         automated playlist updates according to the configured schedule.
         """
         try:
-            if not all([self.spotify_client, self.track_selector, self.playlist_manager]):
+            # initialize() sets all components together, so the manager is enough
+            if self.playlist_manager is None:
                 raise RuntimeError("Bot not initialized. Call initialize() first.")
             
             logger.info("Starting Spotify App Agent...")
             
-            # Start the scheduler
-            self.playlist_manager.start_scheduler()
+            # Start the scheduler on the bot's event loop
+            self.playlist_manager.start_scheduler(loop=self._loop)
             
             self.running = True
             logger.info("Bot started successfully")
             
-        except Exception as e:
-            logger.error(f"Failed to start bot: {e}")
+        except Exception:
+            logger.exception("Failed to start bot")
             raise
     
     def stop(self) -> None:
@@ -180,54 +330,63 @@ class SpotifyBot:
         Stop the bot and scheduler gracefully.
         """
         try:
-            if self.running and self.playlist_manager:
+            if self.running and self.playlist_manager is not None:
                 logger.info("Stopping Spotify App Agent...")
                 self.playlist_manager.stop_scheduler()
                 self.running = False
                 logger.info("Bot stopped successfully")
-        except Exception as e:
-            logger.error(f"Error stopping bot: {e}")
+        except Exception:
+            logger.exception("Error stopping bot")
+        finally:
+            self._wake()
     
-    def run(self) -> None:
+    def _wake(self) -> None:
+        """Wake run_async() so it can shut down; safe to call from any thread."""
+        if self._loop is not None and self._stop_event is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._stop_event.set)
+    
+    async def run_async(self) -> None:
         """
-        Run the bot in the main thread.
+        Run the bot on the current asyncio event loop.
         
-        This method starts the bot and keeps it running until interrupted.
-        It sets up signal handlers for graceful shutdown.
+        This coroutine starts the bot, installs signal handlers for graceful
+        shutdown, and waits until stop() or a shutdown signal is received.
         """
         try:
+            self._loop = asyncio.get_running_loop()
+            self._stop_event = asyncio.Event()
+            
             # Set up signal handlers
-            signal.signal(signal.SIGTERM, self._signal_handler)
-            signal.signal(signal.SIGINT, self._signal_handler)
+            _install_signal_handlers(self._loop, self._signal_handler)
             
-            # Start the bot
+            # Start the bot (the scheduler attaches to the running loop)
             self.start()
             
-            # Keep running until interrupted
             try:
-                while self.running:
-                    import time
-                    time.sleep(1)
-            except KeyboardInterrupt:
-                logger.info("Received keyboard interrupt")
+                await self._stop_event.wait()
             finally:
                 self.stop()
                 
-        except Exception as e:
-            logger.error(f"Error running bot: {e}")
+        except Exception:
+            logger.exception("Error running bot")
             raise
     
-    def _signal_handler(self, signum: int, frame: Any) -> None:
+    def run(self) -> None:
+        """
+        Run the bot in the main thread until interrupted.
+        """
+        asyncio.run(self.run_async())
+    
+    def _signal_handler(self, signum: int) -> None:
         """
         Handle shutdown signals.
         
         Args:
             signum: Signal number
-            frame: Current stack frame
         """
-        logger.info(f"Received signal {signum}, shutting down...")
-        self.stop()
-        sys.exit(0)
+        logger.info("Received signal %s, shutting down...", signum)
+        # Only wake run_async(); it stops the scheduler from the main flow
+        self._stop_event.set()
     
     def run_manual_update(self, playlist_type: str) -> None:
         """
@@ -239,33 +398,45 @@ class SpotifyBot:
         Raises:
             ValueError: If playlist_type is invalid
         """
-        valid_types = ['daily', 'weekly', 'monthly', 'yearly']
-        if playlist_type not in valid_types:
-            raise ValueError(f"Invalid playlist type. Must be one of: {valid_types}")
+        if playlist_type not in _VALID_PLAYLIST_TYPES:
+            raise ValueError(f"Invalid playlist type. Must be one of: {sorted(_VALID_PLAYLIST_TYPES)}")
         
         try:
-            logger.info(f"Running manual update for {playlist_type} playlist")
+            logger.info("Running manual update for %s playlist", playlist_type)
             # Initialize if not already done
-            if not self.playlist_manager:
+            if self.playlist_manager is None:
                 self.initialize()
             
             self.playlist_manager.update_playlist(playlist_type)
-            logger.info(f"Manual update completed for {playlist_type}")
-        except Exception as e:
-            logger.error(f"Manual update failed for {playlist_type}: {e}")
+            logger.info("Manual update completed for %s", playlist_type)
+        except Exception:
+            logger.exception("Manual update failed for %s", playlist_type)
             raise
 
 
+@lru_cache(maxsize=1)
+def get_bot() -> SpotifyBot:
+    """
+    Return the process-wide initialized bot.
+    
+    The first call builds and initializes a SpotifyBot; later calls reuse it,
+    so repeated manual updates share one Spotify client and its open
+    connections instead of re-authenticating each time.
+    """
+    bot = SpotifyBot()
+    bot.initialize()
+    return bot
+
+
 def main() -> None:
     """Main entry point for the application."""
     try:
-        bot = SpotifyBot()
-        bot.initialize()
-        bot.run()
+        bot = get_bot()
+        asyncio.run(bot.run_async())
     except KeyboardInterrupt:
         logger.info("Application interrupted by user")
-    except Exception as e:
-        logger.error(f"Application failed: {e}")
+    except Exception:
+        logger.exception("Application failed")
         sys.exit(1)
 
 
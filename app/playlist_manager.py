@@ -4,33 +4,76 @@ Handles playlist scheduling, rollovers, and main orchestration logic.
 """
 
 import os
+import csv
 import json
+import asyncio
 import logging
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from typing import TYPE_CHECKING, Dict, Iterator, List, Any, Optional
 import sqlite3
-import pandas as pd
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.cron import CronTrigger
-import pytz
 
-from .spotify_client import SpotifyClient
-from .track_selector import TrackSelector
+# The scheduler and the other components are only needed for annotations at
+# import time; apscheduler is imported when the scheduler is started.
+if TYPE_CHECKING:
+    from apscheduler.schedulers.asyncio import AsyncIOScheduler
+    from .spotify_client import SpotifyClient
+    from .track_selector import TrackSelector
 
 logger = logging.getLogger(__name__)
 
+# Statements on the update path. The shared connection keeps compiled
+# statements in its cache keyed by SQL text, so reusing these exact strings
+# lets every snapshot and run skip re-preparing them.
+_INSERT_SNAPSHOT_SQL = '''
+    INSERT INTO playlist_snapshots (playlist_type, snapshot_date, tracks_data)
+    VALUES (?, ?, '')
+'''
+
+_INSERT_SNAPSHOT_TRACK_SQL = '''
+    INSERT INTO snapshot_tracks
+        (snapshot_id, position, track_id, track_uri, track_name,
+         artist_ids, artist_names, album_name, release_date, popularity)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+_INSERT_RUN_SQL = '''
+    INSERT INTO playlist_runs (playlist_type, run_timestamp, tracks_count, success, error_message)
+    VALUES (?, ?, ?, ?, ?)
+'''
+
+TRACK_URI_PREFIX = "spotify:track:"
+
+# Upper bound on playlist updates running at the same time
+MAX_UPDATE_WORKERS = 8
+
 class PlaylistManager:
     """Manages playlist creation, updates, and scheduling."""
     
-    def __init__(self, spotify_client: SpotifyClient, track_selector: TrackSelector = None, config: Dict[str, Any] = None):
+    def __init__(self, spotify_client: "SpotifyClient", track_selector: "TrackSelector" = None, config: Dict[str, Any] = None):
         self.spotify_client = spotify_client
         self.track_selector = track_selector
         self.config = config or {}
+        self.scheduler: Optional["AsyncIOScheduler"] = None
+        self._update_executor: Optional[ThreadPoolExecutor] = None
         
-        # Initialize database
-        self.db_path = os.path.join(os.path.dirname(__file__), '..', 'state', 'playlist_state.db')
+        # Initialize database; one connection is shared by all helpers and
+        # scheduler threads, serialized by _db_lock
+        self._db_lock = threading.Lock()
+        self.db_path = os.getenv(
+            'PLAYLIST_STATE_DB',
+            os.path.join(os.path.dirname(__file__), '..', 'state', 'playlist_state.db')
+        )
         self._init_database()
         
+        # Create the snapshot directory up front rather than on every save
+        snapshot_dir = self.config.get('app', {}).get('snapshot_dir')
+        if snapshot_dir:
+            os.makedirs(snapshot_dir, exist_ok=True)
+        
         # Load playlist IDs from config or create them
         self.playlist_ids = self._load_or_create_playlists() if config else {}
         
@@ -38,9 +81,23 @@ class PlaylistManager:
         """Initialize SQLite database for state tracking."""
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        # Autocommit mode: each statement commits on its own
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
         
+        with self._db_lock:
+            # WAL lets dashboard/CLI readers run alongside scheduled writes;
+            # NORMAL sync is durable in WAL mode and skips most fsyncs
+            self._conn.executescript('''
+                PRAGMA journal_mode=WAL;
+                PRAGMA synchronous=NORMAL;
+                PRAGMA temp_store=MEMORY;
+                PRAGMA mmap_size=268435456;
+                PRAGMA cache_size=-20000;
+            ''')
+            self._create_tables(self._conn.cursor())
+    
+    def _create_tables(self, cursor: sqlite3.Cursor):
+        """Create the state tables if they don't exist yet."""
         # Create tables
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS playlist_runs (
@@ -64,6 +121,26 @@ class PlaylistManager:
             )
         ''')
         
+        # One row per track of a snapshot (tracks_data is only filled in by
+        # older versions that stored the whole list as JSON). Artist IDs and
+        # names are JSON arrays, since names may contain commas
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS snapshot_tracks (
+                snapshot_id INTEGER NOT NULL,
+                position INTEGER NOT NULL,
+                track_id TEXT,
+                track_uri TEXT,
+                track_name TEXT,
+                artist_ids TEXT,
+                artist_names TEXT,
+                album_name TEXT,
+                release_date TEXT,
+                popularity INTEGER,
+                PRIMARY KEY (snapshot_id, position)
+            )
+        ''')
+        self._migrate_snapshot_tracks(cursor)
+        
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS playlist_ids (
                 playlist_type TEXT PRIMARY KEY,
@@ -72,14 +149,60 @@ class PlaylistManager:
             )
         ''')
         
-        conn.commit()
-        conn.close()
+        # Indexes for the per-playlist "latest first" lookups and statistics
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_snapshots_type_date
+            ON playlist_snapshots (playlist_type, snapshot_date DESC)
+        ''')
+        
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_runs_type_ts
+            ON playlist_runs (playlist_type, run_timestamp DESC)
+        ''')
+        
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_runs_type_success
+            ON playlist_runs (playlist_type, success)
+        ''')
+    
+    def _migrate_snapshot_tracks(self, cursor: sqlite3.Cursor):
+        """Upgrade a snapshot_tracks table that stored artists as joined names."""
+        columns = {row[1] for row in cursor.execute('PRAGMA table_info(snapshot_tracks)')}
+        if 'artist_ids' in columns:
+            return
+        
+        cursor.execute('ALTER TABLE snapshot_tracks ADD COLUMN artist_ids TEXT')
+        cursor.execute('ALTER TABLE snapshot_tracks ADD COLUMN release_date TEXT')
+        rows = cursor.execute(
+            'SELECT snapshot_id, position, artist_names FROM snapshot_tracks'
+        ).fetchall()
+        cursor.executemany(
+            'UPDATE snapshot_tracks SET artist_names = ?, artist_ids = ? '
+            'WHERE snapshot_id = ? AND position = ?',
+            (
+                (json.dumps(names.split(', ') if names else []), '[]', snapshot_id, position)
+                for snapshot_id, position, names in rows
+            )
+        )
+    
+    @contextmanager
+    def _tx(self) -> Iterator[sqlite3.Connection]:
+        """Run the enclosed statements in a single write transaction."""
+        with self._db_lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
     
     def _load_or_create_playlists(self) -> Dict[str, str]:
         """Load existing playlist IDs or create new playlists."""
         playlist_ids = {}
         persona = self.config['persona']
         prefix = persona['prefix']
+        stored_ids = self._get_stored_playlist_ids()
         
         for playlist_type, config in self.config['playlists'].items():
             if not config.get('active', True):
@@ -88,7 +211,7 @@ class PlaylistManager:
             playlist_name = f"{prefix}{playlist_type.title()} Hits"
             
             # Check if we have a stored playlist ID
-            stored_id = self._get_stored_playlist_id(playlist_type)
+            stored_id = stored_ids.get(playlist_type)
             if stored_id:
                 playlist_ids[playlist_type] = stored_id
                 logger.info(f"Using existing playlist for {playlist_type}: {stored_id}")
@@ -110,63 +233,110 @@ class PlaylistManager:
         
         return playlist_ids
     
-    def _get_stored_playlist_id(self, playlist_type: str) -> Optional[str]:
-        """Get stored playlist ID from database."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('SELECT playlist_id FROM playlist_ids WHERE playlist_type = ?', (playlist_type,))
-        result = cursor.fetchone()
-        conn.close()
-        return result[0] if result else None
+    def _get_stored_playlist_ids(self) -> Dict[str, str]:
+        """Get all stored playlist IDs from database, keyed by playlist type.
+        
+        Read once at startup; afterwards self.playlist_ids is kept in sync
+        by the code that stores new IDs.
+        """
+        with self._db_lock:
+            return dict(self._conn.execute('SELECT playlist_type, playlist_id FROM playlist_ids'))
     
     def _store_playlist_id(self, playlist_type: str, playlist_id: str):
         """Store playlist ID in database."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT OR REPLACE INTO playlist_ids (playlist_type, playlist_id) 
-            VALUES (?, ?)
-        ''', (playlist_type, playlist_id))
-        conn.commit()
-        conn.close()
-    
-    def start_scheduler(self):
-        """Start the scheduler with all configured jobs."""
+        with self._db_lock:
+            self._conn.execute('''
+                INSERT OR REPLACE INTO playlist_ids (playlist_type, playlist_id) 
+                VALUES (?, ?)
+            ''', (playlist_type, playlist_id))
+    
+    def start_scheduler(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> "AsyncIOScheduler":
+        """Start the scheduler with all configured jobs.
+        
+        The scheduler runs on ``loop`` (or the running event loop if none is
+        given) and is returned to the caller.
+        """
+        from apscheduler.schedulers.asyncio import AsyncIOScheduler
+        from apscheduler.triggers.cron import CronTrigger
+        
+        if self.scheduler is None:
+            self.scheduler = AsyncIOScheduler(event_loop=loop) if loop else AsyncIOScheduler()
+        
+        active_types = [
+            playlist_type for playlist_type, config in self.config['playlists'].items()
+            if config.get('active', True)
+        ]
+        
+        # Dedicated worker threads for the blocking updates: one per active
+        # playlist (bounded), so every playlist can update concurrently
+        # without sharing the loop's default executor
+        if self._update_executor is None:
+            self._update_executor = ThreadPoolExecutor(
+                max_workers=max(1, min(MAX_UPDATE_WORKERS, len(active_types))),
+                thread_name_prefix='playlist-update'
+            )
+        
         if not self.scheduler.running:
+            display_name = self.spotify_client.user_profile.get('display_name', 'Unknown')
+            logger.info(f"Connected to Spotify as: {display_name}")
             self.scheduler.start()
             logger.info("Scheduler started")
         
         # Add jobs for each playlist
-        for playlist_type, config in self.config['playlists'].items():
-            if not config.get('active', True):
-                continue
-            
-            cron_expr = config['schedule_cron']
+        for playlist_type in active_types:
+            playlist_config = self.config['playlists'][playlist_type]
+            cron_expr = playlist_config['schedule_cron']
             trigger = CronTrigger.from_crontab(cron_expr)
             
             self.scheduler.add_job(
-                func=self.update_playlist,
+                func=self._update_async,
                 trigger=trigger,
-                args=[playlist_type],
+                # Bind the playlist's settings once instead of looking them
+                # up on every run
+                args=[playlist_type, playlist_config],
                 id=f"update_{playlist_type}",
                 name=f"Update {playlist_type} playlist",
-                replace_existing=True
+                replace_existing=True,
+                misfire_grace_time=60,
+                max_instances=1,
+                coalesce=True
             )
             
             logger.info(f"Added scheduled job for {playlist_type}: {cron_expr}")
+        
+        return self.scheduler
     
     def stop_scheduler(self):
         """Stop the scheduler."""
-        if self.scheduler.running:
+        if self.scheduler is not None and self.scheduler.running:
             self.scheduler.shutdown()
             logger.info("Scheduler stopped")
+        
+        # Don't block the event loop on in-flight updates; they finish on
+        # their own threads
+        if self._update_executor is not None:
+            self._update_executor.shutdown(wait=False)
+            self._update_executor = None
     
-    def update_playlist(self, playlist_type: str):
-        """Update a specific playlist based on its logic type."""
+    async def _update_async(self, playlist_type: str, playlist_config: Optional[Dict[str, Any]] = None):
+        """Scheduled job: run the blocking update on the update executor so
+        the event loop stays free for the other playlist jobs."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(
+            self._update_executor, self.update_playlist, playlist_type, playlist_config
+        )
+    
+    def update_playlist(self, playlist_type: str, playlist_config: Optional[Dict[str, Any]] = None):
+        """Update a specific playlist based on its logic type.
+        
+        ``playlist_config`` defaults to the playlist's entry in the config.
+        """
         try:
             logger.info(f"Starting update for {playlist_type} playlist")
             
-            playlist_config = self.config['playlists'][playlist_type]
+            if playlist_config is None:
+                playlist_config = self.config['playlists'][playlist_type]
+            # The ID is looked up per run since rollovers replace it
             playlist_id = self.playlist_ids.get(playlist_type)
             
             if not playlist_id:
@@ -176,7 +346,8 @@ class PlaylistManager:
             # Get previous snapshot for delta calculation
             previous_snapshot = self._get_latest_snapshot(playlist_type)
             
-            # Get existing tracks for deduplication
+            # Get existing tracks for deduplication; this one listing is
+            # reused for the trim below, so each run fetches it only once
             existing_tracks = self.spotify_client.get_playlist_tracks(playlist_id)
             
             # Select new tracks based on playlist logic type
@@ -193,19 +364,14 @@ class PlaylistManager:
             # Handle different logic types
             logic_type = playlist_config.get('logic', 'general')
             
-            if logic_type == 'previous_day':
-                # Daily: Replace with fresh tracks from previous day
-                logger.info(f"Replacing {playlist_type} playlist with fresh tracks from previous day")
-                self.spotify_client.replace_playlist_tracks(playlist_id, [])
-                track_uris = [track['uri'] for track in selected_tracks]
-                self.spotify_client.add_tracks_to_playlist(playlist_id, track_uris)
-                
-            elif logic_type == 'previous_week':
-                # Weekly: Replace with fresh tracks from previous week
-                logger.info(f"Replacing {playlist_type} playlist with fresh tracks from previous week")
-                self.spotify_client.replace_playlist_tracks(playlist_id, [])
+            if logic_type in ('previous_day', 'previous_week'):
+                # Daily/Weekly: Replace with fresh tracks from the previous
+                # day/week; a single replace leaves no window where the
+                # playlist is empty
+                period = 'day' if logic_type == 'previous_day' else 'week'
+                logger.info(f"Replacing {playlist_type} playlist with fresh tracks from previous {period}")
                 track_uris = [track['uri'] for track in selected_tracks]
-                self.spotify_client.add_tracks_to_playlist(playlist_id, track_uris)
+                self.spotify_client.replace_playlist_tracks(playlist_id, track_uris)
                 
             elif logic_type in ['month_to_date', 'year_to_date']:
                 # Monthly/Yearly: Add new tracks to existing playlist (accumulate)
@@ -213,14 +379,18 @@ class PlaylistManager:
                 track_uris = [track['uri'] for track in selected_tracks]
                 self.spotify_client.add_tracks_to_playlist(playlist_id, track_uris)
                 
-                # Check if we need to trim to stay under size limit
-                current_tracks = self.spotify_client.get_playlist_tracks(playlist_id)
+                # Check if we need to trim to stay under size limit. The
+                # playlist is now the tracks fetched above followed by the
+                # ones just added, so the overflow is known without
+                # re-fetching it (null entries are removed/local tracks)
+                current_uris = [
+                    (item.get('track') or {}).get('uri') for item in existing_tracks
+                ] + track_uris
                 max_size = playlist_config.get('size', 200)
                 
-                if len(current_tracks) > max_size:
-                    # Remove oldest tracks to maintain size limit
-                    tracks_to_remove = current_tracks[max_size:]
-                    track_uris_to_remove = [t['track']['uri'] for t in tracks_to_remove]
+                if len(current_uris) > max_size:
+                    # Remove tracks past the size limit
+                    track_uris_to_remove = [uri for uri in current_uris[max_size:] if uri]
                     self.spotify_client.remove_tracks_from_playlist(playlist_id, track_uris_to_remove)
                     logger.info(f"Trimmed {playlist_type} playlist to {max_size} tracks")
             else:
@@ -228,11 +398,13 @@ class PlaylistManager:
                 track_uris = [track['uri'] for track in selected_tracks]
                 self.spotify_client.add_tracks_to_playlist(playlist_id, track_uris)
             
-            # Save snapshot
-            self._save_snapshot(playlist_type, selected_tracks)
-            
-            # Log success
-            self._log_run(playlist_type, len(selected_tracks), True)
+            # Save snapshot files, then record the snapshot and the successful
+            # run together so they cost a single commit
+            now = datetime.now()
+            self._write_snapshot_files(playlist_type, now, selected_tracks)
+            with self._tx() as conn:
+                self._insert_snapshot(conn, playlist_type, now.isoformat(), selected_tracks)
+                self._insert_run(conn, playlist_type, len(selected_tracks), True)
             
             logger.info(f"Successfully updated {playlist_type} playlist with {len(selected_tracks)} tracks")
             
@@ -294,74 +466,62 @@ class PlaylistManager:
             raise
     
     def _seed_new_playlist(self, playlist_type: str, playlist_id: str):
-        """Seed a new playlist with top tracks from other playlists."""
-        seeding_config = self.config.get('seeding', {})
-        
-        if playlist_type == 'monthly':
-            # Seed with top daily and weekly tracks
-            top_daily = seeding_config.get('monthly', {}).get('top_daily', 25)
-            top_weekly = seeding_config.get('monthly', {}).get('top_weekly', 50)
-            
-            seed_tracks = []
-            
-            # Get top daily tracks
-            daily_id = self.playlist_ids.get('daily')
-            if daily_id:
-                daily_tracks = self.spotify_client.get_playlist_tracks(daily_id)
-                seed_tracks.extend(daily_tracks[:top_daily])
-            
-            # Get top weekly tracks
-            weekly_id = self.playlist_ids.get('weekly')
-            if weekly_id:
-                weekly_tracks = self.spotify_client.get_playlist_tracks(weekly_id)
-                seed_tracks.extend(weekly_tracks[:top_weekly])
-            
-            if seed_tracks:
-                track_uris = [track['track']['uri'] for track in seed_tracks]
-                self.spotify_client.replace_playlist_tracks(playlist_id, track_uris)
-                logger.info(f"Seeded {playlist_type} playlist with {len(track_uris)} tracks")
+        """Seed a new monthly/yearly playlist with top daily and weekly tracks."""
+        if playlist_type not in ('monthly', 'yearly'):
+            return
         
-        elif playlist_type == 'yearly':
-            # Similar seeding logic for yearly
-            top_daily = seeding_config.get('yearly', {}).get('top_daily', 25)
-            top_weekly = seeding_config.get('yearly', {}).get('top_weekly', 50)
-            
-            seed_tracks = []
-            
-            daily_id = self.playlist_ids.get('daily')
-            if daily_id:
-                daily_tracks = self.spotify_client.get_playlist_tracks(daily_id)
-                seed_tracks.extend(daily_tracks[:top_daily])
-            
-            weekly_id = self.playlist_ids.get('weekly')
-            if weekly_id:
-                weekly_tracks = self.spotify_client.get_playlist_tracks(weekly_id)
-                seed_tracks.extend(weekly_tracks[:top_weekly])
-            
-            if seed_tracks:
-                track_uris = [track['track']['uri'] for track in seed_tracks]
-                self.spotify_client.replace_playlist_tracks(playlist_id, track_uris)
-                logger.info(f"Seeded {playlist_type} playlist with {len(track_uris)} tracks")
-    
-    def _save_snapshot(self, playlist_type: str, tracks: List[Dict[str, Any]]):
-        """Save playlist snapshot to database and files."""
-        timestamp = datetime.now().isoformat()
+        seeding_config = self.config.get('seeding', {}).get(playlist_type, {})
+        top_daily = seeding_config.get('top_daily', 25)
+        top_weekly = seeding_config.get('top_weekly', 50)
         
-        # Save to database
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO playlist_snapshots (playlist_type, snapshot_date, tracks_data)
-            VALUES (?, ?, ?)
-        ''', (playlist_type, timestamp, json.dumps(tracks)))
-        conn.commit()
-        conn.close()
+        # Fetch both source playlists in parallel; the requests are independent
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            daily_future = executor.submit(self._get_seed_tracks, self.playlist_ids.get('daily'))
+            weekly_future = executor.submit(self._get_seed_tracks, self.playlist_ids.get('weekly'))
+            seed_tracks = daily_future.result()[:top_daily] + weekly_future.result()[:top_weekly]
         
-        # Save to JSON file
-        snapshot_dir = self.config['app']['snapshot_dir']
-        os.makedirs(snapshot_dir, exist_ok=True)
+        if seed_tracks:
+            track_uris = [track['track']['uri'] for track in seed_tracks]
+            self.spotify_client.replace_playlist_tracks(playlist_id, track_uris)
+            logger.info(f"Seeded {playlist_type} playlist with {len(track_uris)} tracks")
+    
+    def _get_seed_tracks(self, playlist_id: Optional[str]) -> List[Dict[str, Any]]:
+        """Get the tracks of a seeding source playlist, if it exists."""
+        if not playlist_id:
+            return []
+        return self.spotify_client.get_playlist_tracks(playlist_id)
+    
+    def _insert_snapshot(self, conn: sqlite3.Connection, playlist_type: str, timestamp: str,
+                         tracks: List[Dict[str, Any]]):
+        """Insert a playlist snapshot and its tracks (caller holds the connection)."""
+        snapshot_id = conn.execute(_INSERT_SNAPSHOT_SQL, (playlist_type, timestamp)).lastrowid
         
-        date_str = datetime.now().strftime('%Y%m%d_%H%M%S')
+        # One statement executed for every track row
+        rows = []
+        for position, track in enumerate(tracks):
+            artists = track.get('artists') or []
+            album = track.get('album') or {}
+            rows.append((
+                snapshot_id,
+                position,
+                track.get('id'),
+                track.get('uri'),
+                track.get('name'),
+                json.dumps([artist.get('id') for artist in artists]),
+                json.dumps([artist.get('name', '') for artist in artists]),
+                album.get('name'),
+                album.get('release_date'),
+                track.get('popularity')
+            ))
+        conn.executemany(_INSERT_SNAPSHOT_TRACK_SQL, rows)
+    
+    def _write_snapshot_files(self, playlist_type: str, now: datetime, tracks: List[Dict[str, Any]]):
+        """Save playlist snapshot to JSON and CSV files."""
+        # Save to JSON file; the name and the recorded timestamp come from
+        # the same instant as the database row
+        snapshot_dir = self.config['app']['snapshot_dir']
+        timestamp = now.isoformat()
+        date_str = now.strftime('%Y%m%d_%H%M%S')
         json_path = os.path.join(snapshot_dir, f"{playlist_type}_{date_str}.json")
         
         snapshot_data = {
@@ -371,43 +531,81 @@ class PlaylistManager:
             'tracks': tracks
         }
         
+        # Compact one-shot encoding: no indentation whitespace and a single write
         with open(json_path, 'w') as f:
-            json.dump(snapshot_data, f, indent=2)
+            f.write(json.dumps(snapshot_data, separators=(',', ':')))
         
         # Save to CSV
         csv_path = os.path.join(snapshot_dir, f"{playlist_type}_{date_str}.csv")
-        df = pd.DataFrame(tracks)
-        df.to_csv(csv_path, index=False)
+        # Columns are the union of track keys, in first-seen order
+        fieldnames = list(dict.fromkeys(key for track in tracks for key in track))
+        with open(csv_path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames, lineterminator='\n')
+            writer.writeheader()
+            writer.writerows(tracks)
         
         logger.info(f"Saved snapshot for {playlist_type}: {json_path}, {csv_path}")
     
-    def _get_latest_snapshot(self, playlist_type: str) -> Optional[Dict[str, Any]]:
-        """Get the latest snapshot for a playlist."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT tracks_data FROM playlist_snapshots 
-            WHERE playlist_type = ? 
-            ORDER BY snapshot_date DESC 
-            LIMIT 1
-        ''', (playlist_type,))
-        result = cursor.fetchone()
-        conn.close()
-        
-        if result:
-            return json.loads(result[0])
-        return None
+    def _get_latest_snapshot(self, playlist_type: str) -> Optional[List[Dict[str, Any]]]:
+        """Get the tracks of the latest snapshot for a playlist."""
+        with self._db_lock:
+            result = self._conn.execute('''
+                SELECT id, tracks_data FROM playlist_snapshots 
+                WHERE playlist_type = ? 
+                ORDER BY snapshot_date DESC 
+                LIMIT 1
+            ''', (playlist_type,)).fetchone()
+            if not result:
+                return None
+            
+            rows = self._conn.execute('''
+                SELECT track_id, track_uri, track_name, artist_ids, artist_names,
+                       album_name, release_date, popularity
+                FROM snapshot_tracks
+                WHERE snapshot_id = ?
+                ORDER BY position
+            ''', (result[0],)).fetchall()
+        
+        if not rows and result[1]:
+            # Snapshot written before tracks were normalized
+            return json.loads(result[1])
+        
+        tracks = []
+        for (track_id, track_uri, track_name, artist_ids, artist_names,
+             album_name, release_date, popularity) in rows:
+            names = json.loads(artist_names) if artist_names else []
+            ids = json.loads(artist_ids) if artist_ids else []
+            artists = []
+            for i, name in enumerate(names):
+                artist = {'name': name}
+                if i < len(ids) and ids[i] is not None:
+                    artist['id'] = ids[i]
+                artists.append(artist)
+            album = {'name': album_name}
+            if release_date is not None:
+                album['release_date'] = release_date
+            tracks.append({
+                'id': track_id,
+                'uri': track_uri,
+                'name': track_name,
+                'artists': artists,
+                'album': album,
+                'popularity': popularity
+            })
+        return tracks
+    
+    def _insert_run(self, conn: sqlite3.Connection, playlist_type: str, tracks_count: int,
+                    success: bool, error_message: str = None):
+        """Insert a playlist run row (caller holds the connection)."""
+        conn.execute(
+            _INSERT_RUN_SQL,
+            (playlist_type, datetime.now().isoformat(), tracks_count, success, error_message)
+        )
     
     def _log_run(self, playlist_type: str, tracks_count: int, success: bool, error_message: str = None):
         """Log a playlist update run."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO playlist_runs (playlist_type, run_timestamp, tracks_count, success, error_message)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (playlist_type, datetime.now().isoformat(), tracks_count, success, error_message))
-        conn.commit()
-        conn.close()
+        with self._db_lock:
+            self._insert_run(self._conn, playlist_type, tracks_count, success, error_message)
     
     def get_playlist_id(self, playlist_type: str) -> str:
         """Get playlist ID by type."""
@@ -425,8 +623,18 @@ class PlaylistManager:
         if not track_ids:
             return True
         
+        track_uris = self._track_uris(track_ids)
+        return self._add_uris(playlist_id, track_uris)
+    
+    @staticmethod
+    def _track_uris(track_ids: List[str]) -> List[str]:
+        """Build Spotify track URIs from track IDs."""
+        prefix = TRACK_URI_PREFIX
+        return [prefix + track_id for track_id in track_ids]
+    
+    def _add_uris(self, playlist_id: str, track_uris: List[str]) -> bool:
+        """Append track URIs to a playlist, reporting success."""
         try:
-            track_uris = [f"spotify:track:{track_id}" for track_id in track_ids]
             self.spotify_client.add_tracks_to_playlist(playlist_id, track_uris)
             return True
         except Exception as e:
@@ -436,7 +644,7 @@ class PlaylistManager:
     def replace_playlist_tracks(self, playlist_id: str, track_ids: List[str]) -> bool:
         """Replace all tracks in a playlist."""
         try:
-            track_uris = [f"spotify:track:{track_id}" for track_id in track_ids]
+            track_uris = self._track_uris(track_ids)
             self.spotify_client.replace_playlist_tracks(playlist_id, track_uris)
             return True
         except Exception as e:
@@ -450,16 +658,7 @@ class PlaylistManager:
     def log_playlist_update(self, playlist_type: str, track_count: int, success: bool) -> bool:
         """Log playlist update to database."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO playlist_runs (playlist_type, run_timestamp, tracks_count, success)
-                VALUES (?, ?, ?, ?)
-            ''', (playlist_type, datetime.now().isoformat(), track_count, success))
-            
-            conn.commit()
-            conn.close()
+            self._log_run(playlist_type, track_count, success)
             return True
         except Exception as e:
             logger.error(f"Failed to log playlist update: {e}")
@@ -468,19 +667,17 @@ class PlaylistManager:
     def get_playlist_update_history(self, playlist_type: str, limit: int = 10) -> List[Dict[str, Any]]:
         """Get playlist update history."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT run_timestamp, tracks_count, success, error_message
-                FROM playlist_runs
-                WHERE playlist_type = ?
-                ORDER BY run_timestamp DESC
-                LIMIT ?
-            ''', (playlist_type, limit))
+            with self._db_lock:
+                rows = self._conn.execute('''
+                    SELECT run_timestamp, tracks_count, success, error_message
+                    FROM playlist_runs
+                    WHERE playlist_type = ?
+                    ORDER BY run_timestamp DESC
+                    LIMIT ?
+                ''', (playlist_type, limit)).fetchall()
             
             results = []
-            for row in cursor.fetchall():
+            for row in rows:
                 results.append({
                     'timestamp': row[0],
                     'track_count': row[1],
@@ -488,7 +685,6 @@ class PlaylistManager:
                     'error': row[3]
                 })
             
-            conn.close()
             return results
         except Exception as e:
             logger.error(f"Failed to get playlist history: {e}")
@@ -497,25 +693,21 @@ class PlaylistManager:
     def get_playlist_statistics(self, playlist_type: str) -> Dict[str, Any]:
         """Get playlist statistics."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT 
-                    COUNT(*) as total_updates,
-                    SUM(CASE WHEN success THEN 1 ELSE 0 END) as successful_updates,
-                    SUM(CASE WHEN NOT success THEN 1 ELSE 0 END) as failed_updates
-                FROM playlist_runs
-                WHERE playlist_type = ?
-            ''', (playlist_type,))
-            
-            row = cursor.fetchone()
-            conn.close()
-            
+            with self._db_lock:
+                # success is stored as 0/1, so it can be summed directly
+                row = self._conn.execute('''
+                    SELECT 
+                        COUNT(*) AS total_updates,
+                        COALESCE(SUM(success), 0) AS successful_updates
+                    FROM playlist_runs
+                    WHERE playlist_type = ?
+                ''', (playlist_type,)).fetchone()
+            
+            total_updates, successful_updates = row
             return {
-                'total_updates': row[0] or 0,
-                'successful_updates': row[1] or 0,
-                'failed_updates': row[2] or 0
+                'total_updates': total_updates,
+                'successful_updates': successful_updates,
+                'failed_updates': total_updates - successful_updates
             }
         except Exception as e:
             logger.error(f"Failed to get playlist statistics: {e}")
@@ -527,7 +719,7 @@ class PlaylistManager:
             # Try to get playlist info
             self.spotify_client.get_playlist(playlist_id)
             return True
-        except:
+        except Exception:
             return False
     
     def get_playlist_info(self, playlist_id: str) -> Dict[str, Any]:
@@ -536,11 +728,15 @@ class PlaylistManager:
     
     def batch_add_tracks(self, playlists: List[str], track_ids: List[str]) -> List[bool]:
         """Add tracks to multiple playlists."""
-        results = []
-        for playlist_id in playlists:
-            result = self.add_tracks_to_playlist(playlist_id, track_ids)
-            results.append(result)
-        return results
+        if not playlists:
+            return []
+        if not track_ids:
+            return [True] * len(playlists)
+        
+        # Build the URIs once and update the playlists concurrently
+        track_uris = self._track_uris(track_ids)
+        with ThreadPoolExecutor(max_workers=min(MAX_UPDATE_WORKERS, len(playlists))) as executor:
+            return list(executor.map(lambda playlist_id: self._add_uris(playlist_id, track_uris), playlists))
     
     def update_playlist_name(self, playlist_id: str, name: str) -> bool:
         """Update playlist name."""
@@ -576,11 +772,7 @@ class PlaylistManager:
             if not tracks:
                 return 0.0
             
-            artists = set()
-            for track in tracks:
-                if 'track' in track and 'artists' in track['track']:
-                    for artist in track['track']['artists']:
-                        artists.add(artist['name'])
+            artists = set(self._artist_names(tracks))
             
             return len(artists) / len(tracks) if tracks else 0.0
         except Exception as e:
@@ -591,21 +783,27 @@ class PlaylistManager:
         """Get most common artists in playlist."""
         try:
             tracks = self.get_playlist_tracks(playlist_id)
-            artist_counts = {}
-            
-            for track in tracks:
-                if 'track' in track and 'artists' in track['track']:
-                    for artist in track['track']['artists']:
-                        artist_name = artist['name']
-                        artist_counts[artist_name] = artist_counts.get(artist_name, 0) + 1
+            artist_counts = Counter(self._artist_names(tracks))
             
-            # Sort by count and return top artists
-            sorted_artists = sorted(artist_counts.items(), key=lambda x: x[1], reverse=True)
-            return [{'name': name, 'count': count} for name, count in sorted_artists[:limit]]
+            # Only the top entries are needed, so skip sorting every artist
+            return [{'name': name, 'count': count} for name, count in artist_counts.most_common(limit)]
         except Exception as e:
             logger.error(f"Failed to get most common artists: {e}")
             return []
     
+    @staticmethod
+    def _artist_names(tracks: List[Dict[str, Any]]) -> List[str]:
+        """Flatten playlist items into one artist name per track credit.
+        
+        Counter and set() then tally the flat list in C; for large playlists
+        this is faster than numpy.unique, which has to sort the names.
+        """
+        return [
+            artist['name']
+            for track in tracks if track.get('track')
+            for artist in track['track'].get('artists', ())
+        ]
+    
     def get_playlist_mood(self, playlist_id: str) -> Dict[str, Any]:
         """Analyze playlist mood (placeholder implementation)."""
         try:
@@ -4,14 +4,67 @@ Handles authentication, rate limiting, and API calls for the Spotify App Agent T
 """
 
 import os
+import json
 import time
+import threading
 import requests
-from typing import Dict, List, Optional, Any
-from tenacity import retry, stop_after_attempt, wait_exponential
+from collections import deque
+from requests.adapters import HTTPAdapter
+from functools import cached_property
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Any, Tuple, Union
+from urllib3.util.retry import Retry
 import logging
 
 logger = logging.getLogger(__name__)
 
+BASE_URL = "https://api.spotify.com/v1"
+TOKEN_URL = "https://accounts.spotify.com/api/token"
+
+# How long a profile cached on disk is trusted before /me is called again
+PROFILE_CACHE_TTL = 24 * 60 * 60
+
+# How long the name -> playlist index is reused before the listing is
+# fetched again
+PLAYLIST_INDEX_TTL = 300
+
+# Read-only listings reused across playlist types built in the same run
+NEW_RELEASES_TTL = 300
+SEARCH_TTL = 120
+RESPONSE_CACHE_MAX = 512
+
+# Pause before the quota runs out when a response reports this many (or
+# fewer) requests remaining in the current window
+RATE_LIMIT_REMAINING_THRESHOLD = 1
+
+# Spotify counts requests over a rolling 30 second window; stay under this
+# many per window regardless of how the token bucket is tuned
+RATE_LIMIT_WINDOW = 30.0  # seconds
+RATE_LIMIT_WINDOW_MAX = 180
+
+# AIMD limits on in-flight requests: grow by one while latency stays under
+# the target, halve on 429/5xx/connection errors or slow responses
+CONCURRENCY_INITIAL = 4
+CONCURRENCY_MIN = 1
+CONCURRENCY_MAX = 16
+CONCURRENCY_INCREASE = 1
+CONCURRENCY_DECREASE = 0.5
+TARGET_LATENCY = 0.5  # seconds
+LATENCY_WINDOW = 32
+
+# Attempts per API call when Spotify answers 429 or 401; connection errors
+# and 502/503/504 are retried by the session adapter instead
+MAX_REQUEST_ATTEMPTS = 3
+
+
+class RateLimitedError(Exception):
+    """Raised when Spotify answers 429 Too Many Requests."""
+    
+    def __init__(self, retry_after: float):
+        super().__init__(f"Rate limited, retry after {retry_after} seconds")
+        self.retry_after = retry_after
+
+
 class SpotifyClient:
     """Spotify API client with authentication and rate limiting."""
     
@@ -26,36 +79,124 @@ class SpotifyClient:
         
         self.access_token = None
         self.token_expires_at = 0
-        self.base_url = "https://api.spotify.com/v1"
+        # Serializes refreshes so concurrent requests share one new token
+        self._token_lock = threading.Lock()
+        # Request headers, rebuilt only when the access token changes
+        self._headers: Dict[str, str] = {}
+        self._headers_token: Optional[str] = None
+        self.base_url = BASE_URL
+        # Fixed for the client's lifetime, so built once
+        self._user_playlists_endpoint = f'/users/{self.user_id}/playlists'
+        
+        # Shared session so API and token calls reuse pooled keep-alive
+        # connections instead of opening a new TCP/TLS connection per request.
+        self._session = requests.Session()
+        # Transient failures are retried at the connection level with
+        # backoff; POST is left out so a retried 5xx can't add tracks twice.
+        # 429 is handled in _make_request, which pauses every thread
+        transport_retry = Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=[502, 503, 504],
+            raise_on_status=False,
+        )
+        self._session.mount('https://', HTTPAdapter(
+            pool_connections=4, pool_maxsize=32, max_retries=transport_retry
+        ))
+        # Resolve proxy and CA bundle settings from the environment once for
+        # each host the client calls, since NO_PROXY may treat them
+        # differently; otherwise every request re-reads them (and ~/.netrc)
+        self._api_env = self._environment_settings(self.base_url)
+        self._token_env = self._environment_settings(TOKEN_URL)
+        self._session.trust_env = False
+        
+        # Worker threads for fetching the remaining pages of a listing in
+        # parallel; threads are only started when first needed
+        self._pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix='spotify-page')
         
-        # Rate limiting
-        self.last_request_time = 0
-        self.min_request_interval = 0.1  # 100ms between requests
+        # On-disk copies of the /me response and the access token, shared
+        # across restarts
+        self.profile_cache_path = os.getenv('SPOTIFY_PROFILE_CACHE', '/app/state/profile.json')
+        self.token_cache_path = os.getenv('SPOTIFY_TOKEN_CACHE', '/app/state/token.json')
+        self._load_cached_token()
         
+        # Rate limiting: token bucket averaging 10 requests/second with
+        # bursts of up to 10, shared by all threads using this client
+        self._bucket_capacity = 10
+        self._bucket_refill_rate = 10.0  # tokens per second
+        self._bucket_tokens = float(self._bucket_capacity)
+        self._bucket_last = time.monotonic()
+        self._bucket_lock = threading.Lock()
+        # Send times of the requests in the current rolling window
+        self._window = deque()
+        # Monotonic time before which no request may be sent (Retry-After or
+        # an exhausted quota reported by the API)
+        self._pause_until = 0.0
+        
+        # Playlists by name, built from one listing and kept in step with
+        # create_playlist/update_playlist
+        self._playlist_index: Optional[Dict[str, Dict[str, Any]]] = None
+        self._playlist_index_ts = 0.0
+        self._playlist_index_lock = threading.Lock()
+        
+        # (endpoint, args) -> (expires_at, items) for search and new releases
+        self._response_cache: Dict[tuple, Tuple[float, List[Dict[str, Any]]]] = {}
+        self._response_cache_lock = threading.Lock()
+        
+        # Adaptive cap on concurrent in-flight requests
+        self._concurrency = CONCURRENCY_INITIAL
+        self._in_flight = 0
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._concurrency_cond = threading.Condition()
+        
+    def close(self):
+        """Close the pooled HTTP connections and page-fetch threads."""
+        self._pool.shutdown()
+        self._session.close()
+    
+    def _environment_settings(self, url: str) -> Dict[str, Any]:
+        """Proxy, CA bundle and client certificate settings for ``url``."""
+        settings = self._session.merge_environment_settings(url, {}, None, None, None)
+        return {name: settings[name] for name in ('proxies', 'verify', 'cert')}
+    
+    def __enter__(self) -> 'SpotifyClient':
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
     def _get_headers(self) -> Dict[str, str]:
         """Get headers with current access token."""
         if not self.access_token or time.time() >= self.token_expires_at:
-            self._refresh_access_token()
+            with self._token_lock:
+                # Another thread may have refreshed while we waited
+                if not self.access_token or time.time() >= self.token_expires_at:
+                    self._refresh_access_token()
         
-        return {
-            'Authorization': f'Bearer {self.access_token}',
-            'Content-Type': 'application/json'
-        }
+        # Shared between calls; callers that need other headers must copy it
+        if self._headers_token != self.access_token:
+            self._headers = {
+                'Authorization': f'Bearer {self.access_token}',
+                'Content-Type': 'application/json'
+            }
+            self._headers_token = self.access_token
+        return self._headers
     
     def _refresh_access_token(self):
         """Refresh the access token using the refresh token."""
         try:
-            response = requests.post('https://accounts.spotify.com/api/token', data={
+            response = self._session.post(TOKEN_URL, data={
                 'grant_type': 'refresh_token',
                 'refresh_token': self.refresh_token,
                 'client_id': self.client_id,
                 'client_secret': self.client_secret
-            })
+            }, **self._token_env)
             
             if response.status_code == 200:
                 data = response.json()
                 self.access_token = data['access_token']
                 self.token_expires_at = time.time() + data['expires_in'] - 60  # Buffer
+                self._save_cached_token()
                 logger.info("Access token refreshed successfully")
                 return self.access_token
             else:
@@ -66,47 +207,219 @@ class SpotifyClient:
             logger.error(f"Error refreshing token: {e}")
             raise
     
+    def _load_cached_token(self):
+        """Reuse an unexpired access token cached by a previous process."""
+        try:
+            with open(self.token_cache_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached.get('client_id') == self.client_id and time.time() < cached['token_expires_at']:
+                self.access_token = cached['access_token']
+                self.token_expires_at = cached['token_expires_at']
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+    
+    def _save_cached_token(self):
+        """Write the current access token to the cache file (owner-only).
+        
+        The file is replaced atomically, so concurrent processes never read
+        a partial token.
+        """
+        path = self.token_cache_path
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'client_id': self.client_id,
+                    'access_token': self.access_token,
+                    'token_expires_at': self.token_expires_at
+                }, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not cache access token: {e}")
+    
     def refresh_access_token(self):
         """Public method to refresh access token."""
         return self._refresh_access_token()
     
     def _rate_limit(self):
-        """Implement rate limiting between requests."""
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
+        """Take a token from the rate-limit bucket, waiting until one is available.
         
-        if time_since_last < self.min_request_interval:
-            sleep_time = self.min_request_interval - time_since_last
-            time.sleep(sleep_time)
+        The bucket smooths bursts; the rolling window caps the total sent per
+        RATE_LIMIT_WINDOW so a long run of requests can't exceed the quota.
+        """
+        pause = self._pause_until - time.monotonic()
+        if pause > 0:
+            time.sleep(pause)
         
-        self.last_request_time = time.time()
+        while True:
+            with self._bucket_lock:
+                now = time.monotonic()
+                while self._window and self._window[0] <= now - RATE_LIMIT_WINDOW:
+                    self._window.popleft()
+                
+                elapsed = now - self._bucket_last
+                self._bucket_last = now
+                self._bucket_tokens = min(
+                    self._bucket_capacity,
+                    self._bucket_tokens + elapsed * self._bucket_refill_rate
+                )
+                
+                if len(self._window) >= RATE_LIMIT_WINDOW_MAX:
+                    # Wait for the oldest request to leave the window
+                    wait = self._window[0] + RATE_LIMIT_WINDOW - now
+                elif self._bucket_tokens >= 1:
+                    self._bucket_tokens -= 1
+                    self._window.append(now)
+                    return
+                else:
+                    wait = (1 - self._bucket_tokens) / self._bucket_refill_rate
+            
+            # Sleep outside the lock so other threads can check the bucket
+            time.sleep(wait)
+    
+    def _pause_requests(self, seconds: float):
+        """Hold back every request from this client for ``seconds``."""
+        with self._bucket_lock:
+            self._pause_until = max(self._pause_until, time.monotonic() + seconds)
+    
+    def _check_rate_limit_headers(self, response: requests.Response):
+        """Pause proactively when the response says the quota is nearly used up."""
+        remaining = response.headers.get('X-RateLimit-Remaining')
+        reset = response.headers.get('X-RateLimit-Reset')
+        try:
+            if remaining is not None and reset is not None and \
+                    int(remaining) <= RATE_LIMIT_REMAINING_THRESHOLD:
+                self._pause_requests(float(reset))
+        except ValueError:
+            pass
+    
+    def _acquire_slot(self):
+        """Block until the number of in-flight requests is under the limit."""
+        with self._concurrency_cond:
+            while self._in_flight >= self._concurrency:
+                self._concurrency_cond.wait()
+            self._in_flight += 1
     
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
-    def _make_request(self, method: str, endpoint: str, **kwargs) -> Dict[str, Any]:
-        """Make a rate-limited API request with retries."""
-        self._rate_limit()
+    def _release_slot(self, latency: float, overloaded: bool):
+        """Free an in-flight slot and adjust the limit from the outcome."""
+        with self._concurrency_cond:
+            self._in_flight -= 1
+            self._latencies.append(latency)
+            mean_latency = sum(self._latencies) / len(self._latencies)
+            
+            if overloaded or mean_latency > TARGET_LATENCY:
+                new_limit = max(CONCURRENCY_MIN, int(self._concurrency * CONCURRENCY_DECREASE))
+                # Start a fresh window so one slow burst isn't punished twice
+                self._latencies.clear()
+            else:
+                new_limit = min(CONCURRENCY_MAX, self._concurrency + CONCURRENCY_INCREASE)
+            
+            if new_limit != self._concurrency:
+                logger.debug(f"Request concurrency {self._concurrency} -> {new_limit}")
+                self._concurrency = new_limit
+            self._concurrency_cond.notify_all()
+    
+    def _make_request(self, method: str, endpoint: str,
+                      extra_headers: Optional[Dict[str, str]] = None, **kwargs) -> Dict[str, Any]:
+        """Make a rate-limited API request.
         
+        A 429 is retried once its Retry-After window has passed and a 401
+        with a freshly refreshed token, up to MAX_REQUEST_ATTEMPTS times.
+        ``extra_headers`` override the default headers for this call only.
+        """
         url = f"{self.base_url}{endpoint}"
-        headers = self._get_headers()
-        
-        response = requests.request(method, url, headers=headers, **kwargs)
         
-        if response.status_code == 429:  # Rate limited
-            retry_after = int(response.headers.get('Retry-After', 60))
-            logger.warning(f"Rate limited, waiting {retry_after} seconds")
-            time.sleep(retry_after)
-            raise Exception("Rate limited")
-        
-        if response.status_code >= 400:
-            logger.error(f"API request failed: {response.status_code} - {response.text}")
-            response.raise_for_status()
-        
-        return response.json()
+        for attempt in range(1, MAX_REQUEST_ATTEMPTS + 1):
+            self._rate_limit()
+            headers = self._get_headers()
+            if extra_headers:
+                headers = {**headers, **extra_headers}
+            
+            self._acquire_slot()
+            started = time.monotonic()
+            overloaded = True
+            try:
+                response = self._session.request(method, url, headers=headers,
+                                                 **self._api_env, **kwargs)
+                overloaded = response.status_code == 429 or response.status_code >= 500
+            finally:
+                self._release_slot(time.monotonic() - started, overloaded)
+            
+            if response.status_code == 429:  # Rate limited
+                try:
+                    retry_after = float(response.headers.get('Retry-After', 60))
+                except ValueError:
+                    retry_after = 60.0
+                logger.warning(f"Rate limited, waiting {retry_after} seconds")
+                # Every thread waits out the window in _rate_limit before retrying
+                self._pause_requests(retry_after)
+                if attempt < MAX_REQUEST_ATTEMPTS:
+                    continue
+                raise RateLimitedError(retry_after)
+            
+            self._check_rate_limit_headers(response)
+            
+            if response.status_code == 401:
+                # Token revoked or account changed: force a token refresh on the
+                # retry and stop trusting the cached profile
+                self.access_token = None
+                self.invalidate_profile_cache()
+                if attempt < MAX_REQUEST_ATTEMPTS:
+                    continue
+            
+            if response.status_code >= 400:
+                logger.error(f"API request failed: {response.status_code} - {response.text}")
+                response.raise_for_status()
+            
+            # Some endpoints (e.g. changing playlist details) answer with an empty
+            # body. json.loads takes the raw bytes directly, skipping the charset
+            # detection that Response.json runs first
+            if not response.content:
+                return {}
+            return json.loads(response.content)
     
     def get_user_profile(self) -> Dict[str, Any]:
         """Get current user profile."""
         return self._make_request('GET', '/me')
     
+    @cached_property
+    def user_profile(self) -> Dict[str, Any]:
+        """Current user profile, fetched on first access and then reused."""
+        return self._cached_profile()
+    
+    def _cached_profile(self) -> Dict[str, Any]:
+        """Load the user profile from the disk cache, or fetch and cache it."""
+        path = self.profile_cache_path
+        try:
+            if time.time() - os.path.getmtime(path) < PROFILE_CACHE_TTL:
+                with open(path, 'r', encoding='utf-8') as f:
+                    profile = json.load(f)
+                if profile.get('id', self.user_id) == self.user_id:
+                    return profile
+        except (OSError, ValueError):
+            pass
+        
+        profile = self.get_user_profile()
+        try:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(profile, f)
+        except OSError as e:
+            logger.warning(f"Could not cache user profile: {e}")
+        return profile
+    
+    def invalidate_profile_cache(self):
+        """Drop the cached user profile, both in memory and on disk."""
+        self.__dict__.pop('user_profile', None)
+        try:
+            os.unlink(self.profile_cache_path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Could not remove cached user profile: {e}")
+    
     def create_playlist(self, name: str, description: str = "", public: bool = True) -> Dict[str, Any]:
         """Create a new playlist."""
         data = {
@@ -114,7 +427,11 @@ class SpotifyClient:
             'description': description,
             'public': public
         }
-        return self._make_request('POST', f'/users/{self.user_id}/playlists', json=data)
+        playlist = self._make_request('POST', self._user_playlists_endpoint, json=data)
+        with self._playlist_index_lock:
+            if self._playlist_index is not None:
+                self._playlist_index[name] = playlist
+        return playlist
     
     def update_playlist(self, playlist_id: str, name: str = None, description: str = None, public: bool = None):
         """Update playlist details."""
@@ -128,15 +445,36 @@ class SpotifyClient:
         
         if data:
             self._make_request('PUT', f'/playlists/{playlist_id}', json=data)
+            self._update_playlist_index(playlist_id, data)
+    
+    def _update_playlist_index(self, playlist_id: str, changes: Dict[str, Any]):
+        """Apply changed playlist details to the cached name index."""
+        with self._playlist_index_lock:
+            if self._playlist_index is None:
+                return
+            for name, playlist in list(self._playlist_index.items()):
+                if playlist.get('id') == playlist_id:
+                    playlist = {**playlist, **changes}
+                    if playlist['name'] != name:
+                        del self._playlist_index[name]
+                    self._playlist_index[playlist['name']] = playlist
+                    return
     
     def replace_playlist_tracks(self, playlist_id: str, track_uris: List[str]):
         """Replace all tracks in a playlist."""
-        data = {'uris': track_uris}
+        # Spotify accepts up to 100 URIs per request: the first batch
+        # replaces the contents and any remainder is appended
+        batch_size = 100
+        data = {'uris': track_uris[:batch_size]}
         self._make_request('PUT', f'/playlists/{playlist_id}/tracks', json=data)
+        if len(track_uris) > batch_size:
+            self.add_tracks_to_playlist(playlist_id, track_uris[batch_size:])
     
     def add_tracks_to_playlist(self, playlist_id: str, track_uris: List[str]):
         """Add tracks to a playlist (append to existing tracks)."""
-        # Spotify API has a limit of 100 tracks per request
+        # Spotify API has a limit of 100 tracks per request. Batches are sent
+        # one after another: concurrent appends to the same playlist land in
+        # whatever order the requests finish, which would shuffle the tracks
         batch_size = 100
         for i in range(0, len(track_uris), batch_size):
             batch = track_uris[i:i+batch_size]
@@ -147,86 +485,222 @@ class SpotifyClient:
         """Get playlist details."""
         return self._make_request('GET', f'/playlists/{playlist_id}')
     
-    def get_playlist_tracks(self, playlist_id: str, limit: int = 100) -> List[Dict[str, Any]]:
-        """Get tracks from a playlist."""
-        tracks = []
-        offset = 0
-        
-        while True:
-            params = {'limit': limit, 'offset': offset}
-            response = self._make_request('GET', f'/playlists/{playlist_id}/tracks', params=params)
-            
-            items = response.get('items', [])
-            tracks.extend(items)
-            
-            if len(items) < limit:
-                break
-            
-            offset += limit
+    def get_playlist_tracks(self, playlist_id: str, limit: int = 100, offset: int = 0,
+                            fields: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get tracks from a playlist, starting at ``offset``.
         
-        return tracks
+        ``fields`` is passed through to Spotify to trim the response, e.g.
+        ``'items(track(uri))'`` when only the URIs are needed.
+        """
+        extra_params = {'fields': fields} if fields else None
+        return self._get_paginated(f'/playlists/{playlist_id}/tracks', limit, offset, extra_params)
     
     def get_user_playlists(self, limit: int = 50) -> List[Dict[str, Any]]:
         """Get user's playlists."""
-        playlists = []
-        offset = 0
+        return self._get_paginated(self._user_playlists_endpoint, limit)
+    
+    def iter_playlist_tracks(self, playlist_id: str, limit: int = 100,
+                             fields: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Yield a playlist's tracks while the next page is being fetched."""
+        extra_params = {'fields': fields} if fields else None
+        return self._iter_paginated(f'/playlists/{playlist_id}/tracks', limit, extra_params)
+    
+    def iter_playlist_track_uris(self, playlist_id: str, limit: int = 100) -> Iterator[str]:
+        """Yield only the track URIs of a playlist, skipping unavailable tracks.
+        
+        Spotify trims each item to the URI, so neither the response nor the
+        caller holds the full track metadata.
+        """
+        for item in self.iter_playlist_tracks(playlist_id, limit, fields='items(track(uri))'):
+            uri = (item.get('track') or {}).get('uri')
+            if uri:
+                yield uri
+    
+    def iter_user_playlists(self, limit: int = 50) -> Iterator[Dict[str, Any]]:
+        """Yield the user's playlists while the next page is being fetched."""
+        return self._iter_paginated(self._user_playlists_endpoint, limit)
+    
+    def _iter_paginated(self, endpoint: str, limit: int,
+                        extra_params: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+        """Yield the items of a paginated listing one page ahead of the caller.
         
+        Only the current and the next page are held at a time, and a caller
+        that stops early never requests the pages after that.
+        """
+        def fetch(page_offset: int) -> Dict[str, Any]:
+            params = {'limit': limit, 'offset': page_offset}
+            if extra_params:
+                params.update(extra_params)
+            return self._make_request('GET', endpoint, params=params)
+        
+        offset = 0
+        pending = self._pool.submit(fetch, offset)
         while True:
-            params = {'limit': limit, 'offset': offset}
-            response = self._make_request('GET', f'/users/{self.user_id}/playlists', params=params)
-            
-            items = response.get('items', [])
-            playlists.extend(items)
-            
-            if len(items) < limit:
-                break
-            
+            page_items = pending.result().get('items', [])
+            if len(page_items) < limit:
+                yield from page_items
+                return
             offset += limit
+            pending = self._pool.submit(fetch, offset)
+            yield from page_items
+    
+    def _get_paginated(self, endpoint: str, limit: int, offset: int = 0,
+                       extra_params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Collect the items of a paginated listing, starting at ``offset``.
+        
+        The first page reports the ``total``, so the remaining pages are
+        requested in parallel and joined in order. Responses without a total
+        (e.g. filtered by ``fields``) are paged through one at a time.
+        """
+        def fetch(page_offset: int) -> Dict[str, Any]:
+            params = {'limit': limit, 'offset': page_offset}
+            if extra_params:
+                params.update(extra_params)
+            return self._make_request('GET', endpoint, params=params)
+        
+        response = fetch(offset)
+        items = list(response.get('items', []))
+        total = response.get('total')
+        
+        if len(items) < limit:
+            return items
         
-        return playlists
+        if isinstance(total, int):
+            # Size the result once and fill it page by page; trailing slots
+            # are dropped if the listing shrank while it was being fetched
+            pos = len(items)
+            items.extend([None] * max(total - offset - pos, 0))
+            pages = self._pool.map(fetch, range(offset + limit, total, limit))
+            for page in pages:
+                page_items = page.get('items', [])
+                items[pos:pos + len(page_items)] = page_items
+                pos += len(page_items)
+            del items[pos:]
+            return items
+        
+        while True:
+            offset += limit
+            page_items = fetch(offset).get('items', [])
+            items.extend(page_items)
+            if len(page_items) < limit:
+                return items
     
     def search_tracks(self, query: str, limit: int = 50, market: str = 'US') -> List[Dict[str, Any]]:
-        """Search for tracks."""
-        params = {
-            'q': query,
-            'type': 'track',
-            'limit': limit,
-            'market': market
-        }
-        response = self._make_request('GET', '/search', params=params)
-        return response.get('tracks', {}).get('items', [])
+        """Search for tracks (cached for SEARCH_TTL seconds)."""
+        def fetch() -> List[Dict[str, Any]]:
+            params = {
+                'q': query,
+                'type': 'track',
+                'limit': limit,
+                'market': market
+            }
+            response = self._make_request('GET', '/search', params=params)
+            return response.get('tracks', {}).get('items', [])
+        
+        return self._cached(('search', query, limit, market), SEARCH_TTL, fetch)
+    
+    def _cached(self, key: tuple, ttl: float,
+                fetch: Callable[[], List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Return a listing fetched within the last ``ttl`` seconds, or fetch it.
+        
+        Callers get their own copy of each item, so changes they make
+        (such as a selector's scores) never leak into the cache.
+        """
+        now = time.monotonic()
+        with self._response_cache_lock:
+            entry = self._response_cache.get(key)
+        if entry and entry[0] > now:
+            return [dict(item) for item in entry[1]]
+        
+        items = fetch()
+        with self._response_cache_lock:
+            if len(self._response_cache) >= RESPONSE_CACHE_MAX:
+                self._response_cache = {
+                    k: v for k, v in self._response_cache.items() if v[0] > now
+                }
+                if len(self._response_cache) >= RESPONSE_CACHE_MAX:
+                    # Still full: drop the oldest entry
+                    del self._response_cache[next(iter(self._response_cache))]
+            self._response_cache[key] = (now + ttl, items)
+        return [dict(item) for item in items]
     
     def get_track_audio_features(self, track_ids: List[str]) -> List[Dict[str, Any]]:
         """Get audio features for multiple tracks."""
         if not track_ids:
             return []
         
-        # Spotify API allows max 100 tracks per request
+        # Spotify API allows max 100 tracks per request; batches are fetched
+        # concurrently and flattened back in input order
+        batches = [track_ids[i:i+100] for i in range(0, len(track_ids), 100)]
+        futures = [
+            self._pool.submit(self._make_request, 'GET', '/audio-features',
+                              params={'ids': ','.join(batch)})
+            for batch in batches
+        ]
+        
         features = []
-        for i in range(0, len(track_ids), 100):
-            batch = track_ids[i:i+100]
-            params = {'ids': ','.join(batch)}
-            response = self._make_request('GET', '/audio-features', params=params)
-            features.extend(response.get('audio_features', []))
+        for future in futures:
+            features.extend(future.result().get('audio_features', []))
         
         return features
     
+    def get_albums(self, album_ids: List[str]) -> List[Dict[str, Any]]:
+        """Get full album objects, including their track listings."""
+        return self._get_several('/albums', 'albums', album_ids, 20)
+    
+    def get_tracks(self, track_ids: List[str]) -> List[Dict[str, Any]]:
+        """Get full track objects (with popularity and album) by ID."""
+        return self._get_several('/tracks', 'tracks', track_ids, 50)
+    
+    def _get_several(self, endpoint: str, key: str, ids: List[str],
+                     batch_size: int) -> List[Dict[str, Any]]:
+        """Look up objects by ID in concurrent batches, keeping input order.
+        
+        IDs Spotify doesn't know come back as null and are dropped.
+        """
+        if not ids:
+            return []
+        
+        futures = [
+            self._pool.submit(self._make_request, 'GET', endpoint,
+                              params={'ids': ','.join(ids[i:i+batch_size])})
+            for i in range(0, len(ids), batch_size)
+        ]
+        
+        results = []
+        for future in futures:
+            results.extend(item for item in future.result().get(key, []) if item)
+        return results
+    
     def get_new_releases(self, country: str = 'US', limit: int = 50) -> List[Dict[str, Any]]:
-        """Get new releases."""
-        params = {
-            'country': country,
-            'limit': limit
-        }
-        response = self._make_request('GET', '/browse/new-releases', params=params)
-        return response.get('albums', {}).get('items', [])
+        """Get new releases (cached for NEW_RELEASES_TTL seconds)."""
+        def fetch() -> List[Dict[str, Any]]:
+            params = {
+                'country': country,
+                'limit': limit
+            }
+            response = self._make_request('GET', '/browse/new-releases', params=params)
+            return response.get('albums', {}).get('items', [])
+        
+        return self._cached(('new-releases', country, limit), NEW_RELEASES_TTL, fetch)
     
     def get_playlist_by_name(self, name: str) -> Optional[Dict[str, Any]]:
         """Find a playlist by name."""
-        playlists = self.get_user_playlists()
-        for playlist in playlists:
-            if playlist['name'] == name:
-                return playlist
-        return None
+        with self._playlist_index_lock:
+            if self._playlist_index is None or \
+                    time.monotonic() - self._playlist_index_ts > PLAYLIST_INDEX_TTL:
+                index = {}
+                for playlist in self.get_user_playlists():
+                    # Keep the first match, as a linear scan would
+                    index.setdefault(playlist['name'], playlist)
+                self._playlist_index = index
+                self._playlist_index_ts = time.monotonic()
+            return self._playlist_index.get(name)
+    
+    def invalidate_playlist_index(self):
+        """Drop the cached name index so the next lookup lists playlists again."""
+        with self._playlist_index_lock:
+            self._playlist_index = None
     
     def create_playlist_if_not_exists(self, name: str, description: str = "", public: bool = True) -> str:
         """Create playlist if it doesn't exist, return playlist ID."""
@@ -244,31 +718,31 @@ class SpotifyClient:
         if not track_uris:
             return
         
-        # Spotify API allows removing tracks by URI
-        data = {'uris': track_uris}
-        self._make_request('DELETE', f'/playlists/{playlist_id}/tracks', json=data)
+        # Spotify removes every occurrence of a URI, so duplicates are dropped
+        # before splitting into batches of at most 100. Batches are sent one
+        # after another, like appends, since each one changes the playlist
+        # snapshot the next one applies to
+        unique_uris = list(dict.fromkeys(track_uris))
+        batch_size = 100
+        for i in range(0, len(unique_uris), batch_size):
+            data = {'tracks': [{'uri': uri} for uri in unique_uris[i:i+batch_size]]}
+            self._make_request('DELETE', f'/playlists/{playlist_id}/tracks', json=data)
         logger.info(f"Removed {len(track_uris)} tracks from playlist {playlist_id}")
     
-    def update_playlist_cover(self, playlist_id: str, image_data: str) -> bool:
-        """Update playlist cover image."""
+    def update_playlist_cover(self, playlist_id: str, image_data: Union[str, bytes]) -> bool:
+        """Update playlist cover image.
+        
+        ``image_data`` is the base64-encoded JPEG, as str or bytes; callers
+        uploading the same cover repeatedly can encode it once and reuse it.
+        """
         try:
-            # The image_data should be base64 encoded
-            headers = self._get_headers()
-            headers['Content-Type'] = 'image/jpeg'  # or appropriate content type
-            
-            response = requests.put(
-                f"{self.base_url}/playlists/{playlist_id}/images",
-                headers=headers,
+            self._make_request(
+                'PUT', f'/playlists/{playlist_id}/images',
+                extra_headers={'Content-Type': 'image/jpeg'},
                 data=image_data
             )
-            
-            if response.status_code == 202:
-                logger.info(f"Playlist cover updated successfully for {playlist_id}")
-                return True
-            else:
-                logger.error(f"Failed to update playlist cover: {response.status_code} - {response.text}")
-                return False
-                
+            logger.info(f"Playlist cover updated successfully for {playlist_id}")
+            return True
         except Exception as e:
             logger.error(f"Error updating playlist cover: {e}")
             return False
@@ -3,14 +3,48 @@ Enhanced Track Selection Logic with Date-Based Filtering
 Implements previous day, previous week, month-to-date, and year-to-date logic.
 """
 
+import heapq
 import logging
-from typing import Dict, List, Any, Optional
+import random
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Any, Optional, Tuple
 from datetime import datetime, timedelta
-import pandas as pd
+from functools import lru_cache
+from itertools import chain, islice
+from operator import itemgetter
 from .spotify_client import SpotifyClient
 
 logger = logging.getLogger(__name__)
 
+# Sort key for scored tracks; every code path here sets 'score' first
+_by_score = itemgetter('score')
+
+# Recency boost per playlist type: (maximum age in days, boost)
+RECENCY_BOOSTS = {
+    'daily': (1, 0.15),     # Higher boost for daily
+    'weekly': (7, 0.12),    # Medium boost for weekly
+    'monthly': (30, 0.10),  # Standard boost for monthly
+    'yearly': (365, 0.08),  # Lower boost for yearly
+}
+
+
+@lru_cache(maxsize=4096)
+def _parse_release_date(release_date: str) -> Optional[datetime]:
+    """Parse a day-precision release date, or None for year/month precision.
+    
+    Memoized because tracks from the same album share a release date.
+    """
+    try:
+        return datetime.fromisoformat(release_date)
+    except (ValueError, TypeError):
+        pass
+    try:
+        return datetime.strptime(release_date, '%Y-%m-%d')
+    except (ValueError, TypeError):
+        return None
+
+
 class TrackSelector:
     """Enhanced track selector with date-based filtering and period-specific logic."""
     
@@ -21,188 +55,178 @@ class TrackSelector:
         self.scoring_weights = config.get('scoring', {}).get('weights', {})
         self.territory_weighting = config.get('selection', {}).get('territory_weighting', {})
         self.date_filtering = config.get('selection', {}).get('date_filtering', {})
+        # Discovery searches are network-bound, so several run at once; the
+        # client's own rate limiting still applies to each of them
+        self._pool = ThreadPoolExecutor(
+            max_workers=config.get('selection', {}).get('concurrency', 8),
+            thread_name_prefix='track-search'
+        )
+        # (existing_tracks list, its track IDs) from the last dedupe_tracks call
+        self._existing_ids_cache: Optional[Tuple[List[Dict[str, Any]], frozenset]] = None
         
     def discover_tracks_for_period(self, playlist_type: str, limit: int = 500) -> List[Dict[str, Any]]:
         """Discover tracks based on the specific playlist type and period."""
-        tracks = []
-        
-        if playlist_type == 'previous_day':
-            tracks = self._discover_previous_day_tracks(limit)
-        elif playlist_type == 'previous_week':
-            tracks = self._discover_previous_week_tracks(limit)
-        elif playlist_type == 'month_to_date':
-            tracks = self._discover_month_to_date_tracks(limit)
-        elif playlist_type == 'year_to_date':
-            tracks = self._discover_year_to_date_tracks(limit)
-        else:
-            tracks = self._discover_general_tracks(limit)
-        
-        # Remove duplicates
-        seen_ids = set()
-        unique_tracks = []
-        for track in tracks:
-            if track['id'] not in seen_ids:
-                seen_ids.add(track['id'])
-                unique_tracks.append(track)
-        
-        logger.info(f"Discovered {len(unique_tracks)} unique tracks for {playlist_type}")
-        return unique_tracks[:limit]
+        return self.discover_tracks_for_all_periods({playlist_type: limit})[playlist_type]
     
-    def _discover_previous_day_tracks(self, limit: int) -> List[Dict[str, Any]]:
-        """Discover tracks from the previous day (last 24 hours)."""
-        logger.info("Discovering tracks from previous day...")
-        tracks = []
-        
-        # Get new releases from yesterday
-        yesterday = datetime.now() - timedelta(days=1)
-        yesterday_str = yesterday.strftime('%Y-%m-%d')
-        
-        # Search for tracks released yesterday
+    def discover_tracks_for_all_periods(self, limits: Dict[str, int]) -> Dict[str, List[Dict[str, Any]]]:
+        """Discover tracks for several playlist types in one shared pass.
+        
+        ``limits`` maps each playlist type to its maximum number of tracks.
+        New releases are listed once, every album is looked up once and every
+        distinct genre search runs once, with the largest limit any period
+        asks for; each period's tracks are then picked from that shared pool.
+        """
+        now = datetime.now()
         new_releases = self.spotify_client.get_new_releases(country='US', limit=50)
-        for album in new_releases:
-            if album.get('release_date') == yesterday_str:
-                album_tracks = self.spotify_client.search_tracks(
-                    f"album:{album['name']} artist:{album['artists'][0]['name']}", 
-                    limit=20
-                )
-                tracks.extend(album_tracks)
-        
-        # Search for trending tracks (popular in last 24 hours)
-        for genre_bucket, genre_terms in self.genres.items():
-            for genre in genre_terms[:2]:  # Top 2 terms per bucket
-                # Search for popular tracks with recent activity
-                genre_tracks = self.spotify_client.search_tracks(
-                    f"genre:{genre} year:2025", 
-                    limit=15
-                )
-                tracks.extend(genre_tracks)
+        plans = {
+            playlist_type: self._discovery_plan(playlist_type, new_releases, now)
+            for playlist_type in limits
+        }
         
-        return tracks
+        album_caps = {}
+        query_limits = {}
+        for albums, tracks_per_album, queries in plans.values():
+            for album in albums:
+                if album.get('id'):
+                    album_caps[album['id']] = max(album_caps.get(album['id'], 0), tracks_per_album)
+            for query, query_limit in queries:
+                query_limits[query] = max(query_limits.get(query, 0), query_limit)
+        
+        # Album lookups run while the genre searches are in flight
+        album_tracks = self._pool.submit(self._get_album_tracks, album_caps)
+        search_results = self._search_each(query_limits)
+        tracks_by_album = album_tracks.result()
+        
+        discovered = {}
+        for playlist_type, (albums, tracks_per_album, queries) in plans.items():
+            candidates = [
+                track for album in albums
+                for track in tracks_by_album.get(album.get('id'), [])[:tracks_per_album]
+            ]
+            for query, query_limit in queries:
+                candidates.extend(search_results.get(query, [])[:query_limit])
+            
+            # Remove duplicates, keeping the first occurrence in discovery order
+            unique_tracks = {}
+            for track in candidates:
+                unique_tracks.setdefault(track['id'], track)
+            
+            logger.info(f"Discovered {len(unique_tracks)} unique tracks for {playlist_type}")
+            # Periods share the fetched tracks, so each gets its own copies;
+            # scoring one period writes into its dicts and must not touch another's
+            discovered[playlist_type] = [
+                dict(track) for track in islice(unique_tracks.values(), limits[playlist_type])
+            ]
+        return discovered
     
-    def _discover_previous_week_tracks(self, limit: int) -> List[Dict[str, Any]]:
-        """Discover tracks from the previous week (last 7 days)."""
-        logger.info("Discovering tracks from previous week...")
-        tracks = []
-        
-        # Get new releases from last week
-        week_ago = datetime.now() - timedelta(days=7)
-        
-        new_releases = self.spotify_client.get_new_releases(country='US', limit=50)
-        for album in new_releases:
-            try:
-                release_date = datetime.strptime(album.get('release_date', ''), '%Y-%m-%d')
-                if release_date >= week_ago:
-                    album_tracks = self.spotify_client.search_tracks(
-                        f"album:{album['name']} artist:{album['artists'][0]['name']}", 
-                        limit=15
-                    )
-                    tracks.extend(album_tracks)
-            except:
-                continue
-        
-        # Search for popular tracks by genre from last week
-        for genre_bucket, genre_terms in self.genres.items():
-            for genre in genre_terms[:3]:  # Top 3 terms per bucket
-                genre_tracks = self.spotify_client.search_tracks(
-                    f"genre:{genre} year:2025", 
-                    limit=20
-                )
-                tracks.extend(genre_tracks)
-        
-        return tracks
+    def _discovery_plan(self, playlist_type: str, new_releases: List[Dict[str, Any]],
+                        now: datetime) -> Tuple[List[Dict[str, Any]], int, List[Tuple[str, int]]]:
+        """Albums, tracks per album and genre searches for a playlist type."""
+        if playlist_type == 'previous_day':
+            # Releases from yesterday, plus trending tracks (top 2 terms per bucket)
+            logger.info("Discovering tracks from previous day...")
+            yesterday = now - timedelta(days=1)
+            yesterday_str = yesterday.strftime('%Y-%m-%d')
+            albums = [album for album in new_releases if album.get('release_date') == yesterday_str]
+            return albums, 20, self._genre_queries(2, 15, yesterday, now)
+        
+        if playlist_type == 'previous_week':
+            # Releases and popular tracks by genre from the last 7 days
+            logger.info("Discovering tracks from previous week...")
+            week_ago = now - timedelta(days=7)
+            return self._albums_since(new_releases, week_ago), 15, self._genre_queries(3, 20, week_ago, now)
+        
+        if playlist_type == 'month_to_date':
+            logger.info("Discovering month-to-date tracks...")
+            month_start = datetime(now.year, now.month, 1)
+            return self._albums_since(new_releases, month_start), 10, self._genre_queries(3, 25, month_start, now)
+        
+        if playlist_type == 'year_to_date':
+            logger.info("Discovering year-to-date tracks...")
+            year_start = datetime(now.year, 1, 1)
+            return self._albums_since(new_releases, year_start), 8, self._genre_queries(3, 30, year_start, now)
+        
+        # Fallback general discovery: every new release and this year's genres
+        logger.info("Discovering general tracks...")
+        return new_releases, 20, self._genre_queries(3, 20, now, now)
+    
+    def _genre_queries(self, terms_per_bucket: int, limit: int, since: datetime,
+                       now: datetime) -> List[Tuple[str, int]]:
+        """Genre search queries covering the years from ``since`` to ``now``."""
+        if since.year == now.year:
+            years = str(now.year)
+        else:
+            years = f"{since.year}-{now.year}"
+        return [
+            (f"genre:{genre} year:{years}", limit)
+            for genre_terms in self.genres.values()
+            for genre in genre_terms[:terms_per_bucket]
+        ]
     
-    def _discover_month_to_date_tracks(self, limit: int) -> List[Dict[str, Any]]:
-        """Discover tracks from the current month (month-to-date)."""
-        logger.info("Discovering month-to-date tracks...")
-        tracks = []
+    def _get_album_tracks(self, album_caps: Dict[str, int]) -> Dict[str, List[Dict[str, Any]]]:
+        """Get the first tracks of each album as full track objects.
         
-        # Get current month start date
-        now = datetime.now()
-        month_start = datetime(now.year, now.month, 1)
+        ``album_caps`` maps album ID to how many of its tracks to take. Uses
+        the bulk album and track lookups (20 and 50 IDs per call) instead of
+        one text search per album.
+        """
+        if not album_caps:
+            return {}
         
-        # Get new releases from this month
-        new_releases = self.spotify_client.get_new_releases(country='US', limit=50)
-        for album in new_releases:
-            try:
-                release_date = datetime.strptime(album.get('release_date', ''), '%Y-%m-%d')
-                if release_date >= month_start:
-                    album_tracks = self.spotify_client.search_tracks(
-                        f"album:{album['name']} artist:{album['artists'][0]['name']}", 
-                        limit=10
-                    )
-                    tracks.extend(album_tracks)
-            except:
-                continue
-        
-        # Search for popular tracks by genre from this month
-        for genre_bucket, genre_terms in self.genres.items():
-            for genre in genre_terms[:3]:  # Top 3 terms per bucket
-                genre_tracks = self.spotify_client.search_tracks(
-                    f"genre:{genre} year:2025", 
-                    limit=25
-                )
-                tracks.extend(genre_tracks)
-        
-        return tracks
+        try:
+            album_track_ids = {}
+            for album in self.spotify_client.get_albums(list(album_caps)):
+                items = (album.get('tracks') or {}).get('items', [])
+                cap = album_caps.get(album.get('id'), 0)
+                album_track_ids[album.get('id')] = [item['id'] for item in items[:cap] if item.get('id')]
+            
+            tracks = self.spotify_client.get_tracks(
+                [track_id for track_ids in album_track_ids.values() for track_id in track_ids]
+            )
+            by_id = {track['id']: track for track in tracks}
+            return {
+                album_id: [by_id[track_id] for track_id in track_ids if track_id in by_id]
+                for album_id, track_ids in album_track_ids.items()
+            }
+        except Exception as e:
+            logger.warning(f"Failed to fetch new release tracks: {e}")
+            return {}
     
-    def _discover_year_to_date_tracks(self, limit: int) -> List[Dict[str, Any]]:
-        """Discover tracks from the current year (year-to-date)."""
-        logger.info("Discovering year-to-date tracks...")
-        tracks = []
-        
-        # Get current year start date
-        now = datetime.now()
-        year_start = datetime(now.year, 1, 1)
+    def _albums_since(self, albums: List[Dict[str, Any]], cutoff: datetime) -> List[Dict[str, Any]]:
+        """Albums released on or after ``cutoff``.
+        
+        Day-precision release dates are ISO strings, so they compare in date
+        order without being parsed; year- and month-precision dates are
+        skipped, as they can't be placed against a day cutoff.
+        """
+        cutoff_str = cutoff.strftime('%Y-%m-%d')
+        return [
+            album for album in albums
+            if len(album.get('release_date') or '') == 10 and album['release_date'] >= cutoff_str
+        ]
+    
+    def _search_each(self, queries: Dict[str, int]) -> Dict[str, List[Dict[str, Any]]]:
+        """Run track searches concurrently; maps each query to its results.
+        
+        ``queries`` maps query to result limit. A failed search is logged and
+        left out so one bad query doesn't lose the rest of the discovery pass.
+        """
+        futures = {
+            query: self._pool.submit(self.spotify_client.search_tracks, query, limit=limit)
+            for query, limit in queries.items()
+        }
         
-        # Get new releases from this year
-        new_releases = self.spotify_client.get_new_releases(country='US', limit=50)
-        for album in new_releases:
+        results = {}
+        for query, future in futures.items():
             try:
-                release_date = datetime.strptime(album.get('release_date', ''), '%Y-%m-%d')
-                if release_date >= year_start:
-                    album_tracks = self.spotify_client.search_tracks(
-                        f"album:{album['name']} artist:{album['artists'][0]['name']}", 
-                        limit=8
-                    )
-                    tracks.extend(album_tracks)
-            except:
-                continue
-        
-        # Search for popular tracks by genre from this year
-        for genre_bucket, genre_terms in self.genres.items():
-            for genre in genre_terms[:3]:  # Top 3 terms per bucket
-                genre_tracks = self.spotify_client.search_tracks(
-                    f"genre:{genre} year:2025", 
-                    limit=30
-                )
-                tracks.extend(genre_tracks)
-        
-        return tracks
+                results[query] = future.result()
+            except Exception as e:
+                logger.warning(f"Search failed for '{query}': {e}")
+        return results
     
-    def _discover_general_tracks(self, limit: int) -> List[Dict[str, Any]]:
-        """Fallback general track discovery."""
-        logger.info("Discovering general tracks...")
-        tracks = []
-        
-        # Get new releases
-        new_releases = self.spotify_client.get_new_releases(country='US', limit=50)
-        for album in new_releases:
-            album_tracks = self.spotify_client.search_tracks(
-                f"album:{album['name']} artist:{album['artists'][0]['name']}", 
-                limit=20
-            )
-            tracks.extend(album_tracks)
-        
-        # Search for popular tracks by genre
-        for genre_bucket, genre_terms in self.genres.items():
-            for genre in genre_terms[:3]:  # Top 3 terms per bucket
-                genre_tracks = self.spotify_client.search_tracks(
-                    f"genre:{genre} year:2025", 
-                    limit=20
-                )
-                tracks.extend(genre_tracks)
-        
-        return tracks
+    def close(self):
+        """Shut down the search worker threads."""
+        self._pool.shutdown(wait=False)
     
     def calculate_track_scores(self, tracks: List[Dict[str, Any]], 
                              previous_snapshot: Optional[Dict[str, Any]] = None,
@@ -211,63 +235,74 @@ class TrackSelector:
         if not tracks:
             return []
         
+        # One clock read for the whole pass, so every track ages against the
+        # same instant
+        now = datetime.now()
+        
+        # Everything that depends only on the pass, not the track, is worked
+        # out once here
+        prev_by_id = {}
+        if previous_snapshot and isinstance(previous_snapshot, dict):
+            tracks_list = previous_snapshot.get('tracks', [])
+            if isinstance(tracks_list, list):
+                # Index the previous snapshot once instead of scanning it per track
+                for t in tracks_list:
+                    if isinstance(t, dict) and 'id' in t:
+                        prev_by_id.setdefault(t['id'], t)
+        max_days_old, period_boost = RECENCY_BOOSTS.get(playlist_type, (None, 0.0))
+        # A release is recent when (now - release).days <= max_days_old,
+        # i.e. when it falls after this cutoff
+        recency_cutoff = None
+        if max_days_old is not None:
+            recency_cutoff = now - timedelta(days=max_days_old + 1)
+        
+        # Apply period-specific scoring
+        weights = self.scoring_weights.copy()
+        if playlist_type == 'daily':
+            weights['recency_boost'] = 0.20  # Emphasize recency for daily
+            weights['popularity'] = 0.50
+        elif playlist_type == 'weekly':
+            weights['recency_boost'] = 0.15  # Medium recency for weekly
+            weights['popularity'] = 0.55
+        elif playlist_type == 'monthly':
+            weights['recency_boost'] = 0.10  # Standard recency for monthly
+            weights['popularity'] = 0.55
+        elif playlist_type == 'yearly':
+            weights['recency_boost'] = 0.08  # Lower recency for yearly
+            weights['popularity'] = 0.60  # Emphasize overall popularity
+        weight_popularity = weights.get('popularity', 0.55)
+        weight_delta = weights.get('popularity_delta', 0.30)
+        weight_recency = weights.get('recency_boost', 0.10)
+        
         scored_tracks = []
         for track in tracks:
+            # Read each field of the track once
+            track_id = track['id']
+            album = track.get('album') or {}
+            release_date = album.get('release_date', '')
+            
             # Calculate popularity score
             popularity = track.get('popularity', 0) / 100.0
             
             # Calculate popularity delta
             popularity_delta = 0.0
-            if previous_snapshot and isinstance(previous_snapshot, dict):
-                tracks_list = previous_snapshot.get('tracks', [])
-                if isinstance(tracks_list, list):
-                    prev_track = next((t for t in tracks_list 
-                                     if t.get('id') == track['id']), None)
-                    if prev_track:
-                        prev_popularity = prev_track.get('popularity', 0) / 100.0
-                        popularity_delta = popularity - prev_popularity
+            prev_track = prev_by_id.get(track_id)
+            if prev_track:
+                prev_popularity = prev_track.get('popularity', 0) / 100.0
+                popularity_delta = popularity - prev_popularity
             
             # Calculate recency boost based on playlist type
-            release_date = track['album'].get('release_date', '')
             recency_boost = 0.0
-            if release_date:
-                try:
-                    release_dt = datetime.strptime(release_date, '%Y-%m-%d')
-                    days_old = (datetime.now() - release_dt).days
-                    
-                    # Adjust recency boost based on playlist type
-                    if playlist_type == 'daily' and days_old <= 1:
-                        recency_boost = 0.15  # Higher boost for daily
-                    elif playlist_type == 'weekly' and days_old <= 7:
-                        recency_boost = 0.12  # Medium boost for weekly
-                    elif playlist_type == 'monthly' and days_old <= 30:
-                        recency_boost = 0.10  # Standard boost for monthly
-                    elif playlist_type == 'yearly' and days_old <= 365:
-                        recency_boost = 0.08  # Lower boost for yearly
-                        
-                except:
-                    pass
-            
-            # Apply period-specific scoring
-            weights = self.scoring_weights.copy()
-            if playlist_type == 'daily':
-                weights['recency_boost'] = 0.20  # Emphasize recency for daily
-                weights['popularity'] = 0.50
-            elif playlist_type == 'weekly':
-                weights['recency_boost'] = 0.15  # Medium recency for weekly
-                weights['popularity'] = 0.55
-            elif playlist_type == 'monthly':
-                weights['recency_boost'] = 0.10  # Standard recency for monthly
-                weights['popularity'] = 0.55
-            elif playlist_type == 'yearly':
-                weights['recency_boost'] = 0.08  # Lower recency for yearly
-                weights['popularity'] = 0.60  # Emphasize overall popularity
+            if release_date and recency_cutoff is not None:
+                release_dt = _parse_release_date(release_date)
+                if release_dt is not None and release_dt > recency_cutoff:
+                    recency_boost = period_boost
             
             # Calculate final score
             score = (
-                weights.get('popularity', 0.55) * popularity +
-                weights.get('popularity_delta', 0.30) * popularity_delta +
-                weights.get('recency_boost', 0.10) * recency_boost +
+                weight_popularity * popularity +
+                weight_delta * popularity_delta +
+                weight_recency * recency_boost +
                 0.05 * 0.5  # Default audio feature fit
             )
             
@@ -275,7 +310,7 @@ class TrackSelector:
             scored_tracks.append(track)
         
         # Sort by score
-        scored_tracks.sort(key=lambda x: x['score'], reverse=True)
+        scored_tracks.sort(key=_by_score, reverse=True)
         return scored_tracks
     
     def apply_artist_caps(self, tracks: List[Dict[str, Any]], artist_cap: int) -> List[Dict[str, Any]]:
@@ -283,16 +318,14 @@ class TrackSelector:
         if not tracks:
             return []
         
-        artist_counts = {}
+        artist_counts = defaultdict(int)
         capped_tracks = []
         
         for track in tracks:
             artist_id = track['artists'][0]['id']
-            if artist_id not in artist_counts:
-                artist_counts[artist_id] = 0
-            
-            if artist_counts[artist_id] < artist_cap:
-                artist_counts[artist_id] += 1
+            count = artist_counts[artist_id]
+            if count < artist_cap:
+                artist_counts[artist_id] = count + 1
                 capped_tracks.append(track)
         
         logger.info(f"Applied artist cap {artist_cap}: {len(tracks)} -> {len(capped_tracks)} tracks")
@@ -305,11 +338,7 @@ class TrackSelector:
         if not existing_tracks:
             return tracks
         
-        # Create set of existing track IDs
-        existing_ids = set()
-        for track in existing_tracks:
-            if track and 'track' in track and track['track'] and 'id' in track['track']:
-                existing_ids.add(track['track']['id'])
+        existing_ids = self._existing_track_ids(existing_tracks)
         
         # Filter out existing tracks
         new_tracks = [track for track in tracks if track['id'] not in existing_ids]
@@ -317,23 +346,43 @@ class TrackSelector:
         logger.info(f"Deduplication: {len(tracks)} -> {len(new_tracks)} tracks")
         return new_tracks
     
+    def _existing_track_ids(self, existing_tracks: List[Dict[str, Any]]) -> frozenset:
+        """IDs of a playlist listing, reused while the same list is passed in.
+        
+        The cache holds the list itself, so its id() can't be recycled by a
+        different list while the entry is alive.
+        """
+        cached = self._existing_ids_cache
+        if cached is not None and cached[0] is existing_tracks:
+            return cached[1]
+        
+        ids = frozenset(
+            track['track']['id'] for track in existing_tracks
+            if track and track.get('track') and 'id' in track['track']
+        )
+        self._existing_ids_cache = (existing_tracks, ids)
+        return ids
+    
     def apply_genre_allocation(self, tracks: List[Dict[str, Any]], 
                              target_size: int,
                              diversity_floor_pct: Optional[int] = None) -> List[Dict[str, Any]]:
-        """Apply genre allocation to ensure diversity."""
+        """Apply genre allocation to ensure diversity.
+        
+        ``tracks`` should be sorted by score, best first, as returned by
+        calculate_track_scores; each genre bucket then keeps that order and
+        its first entries are its best.
+        """
         if not tracks:
             return []
         
-        # Count tracks by genre
-        genre_counts = {}
+        # Linear when the input is already sorted, as it normally is
+        tracks = sorted(tracks, key=_by_score, reverse=True)
+        
+        # Bucket tracks by genre
+        genre_counts = defaultdict(list)
         for track in tracks:
-            genre = track.get('genre', 'Other')
-            if genre not in genre_counts:
-                genre_counts[genre] = []
-            genre_counts[genre].append(track)
+            genre_counts[track.get('genre', 'Other')].append(track)
         
-        # Calculate allocation
-        total_tracks = len(tracks)
         allocated_tracks = []
         
         if diversity_floor_pct:
@@ -350,35 +399,29 @@ class TrackSelector:
         else:
             # For daily/weekly playlists, use a more lenient approach
             # Take top tracks from each genre, ensuring we get close to target size
-            available_tracks = sum(len(tracks) for tracks in genre_counts.values())
-            
-            if available_tracks <= target_size:
+            if len(tracks) <= target_size:
                 # If we have fewer tracks than target, take all of them
-                for genre_tracks in genre_counts.values():
-                    allocated_tracks.extend(genre_tracks)
+                allocated_tracks = tracks
             else:
-                # Distribute tracks more evenly across genres
-                genres = list(genre_counts.keys())
-                tracks_per_genre = max(1, target_size // len(genres))
-                
-                for genre, genre_tracks in genre_counts.items():
-                    # Take top tracks from each genre
+                # Distribute tracks more evenly across genres; each genre's
+                # quota is its size capped at an equal share
+                tracks_per_genre = max(1, target_size // len(genre_counts))
+                for genre_tracks in genre_counts.values():
                     allocated_tracks.extend(genre_tracks[:tracks_per_genre])
                 
-                # If we still have room, fill with highest scoring tracks
-                if len(allocated_tracks) < target_size:
-                    remaining_tracks = []
-                    for genre_tracks in genre_counts.values():
-                        remaining_tracks.extend(genre_tracks[tracks_per_genre:])
-                    
-                    # Sort remaining tracks by score and add until we reach target
-                    remaining_tracks.sort(key=lambda x: x['score'], reverse=True)
-                    needed = target_size - len(allocated_tracks)
-                    allocated_tracks.extend(remaining_tracks[:needed])
-        
-        # Sort by score and limit to target size
-        allocated_tracks.sort(key=lambda x: x['score'], reverse=True)
-        return allocated_tracks[:target_size]
+                # If we still have room, fill with the best of what's left
+                needed = target_size - len(allocated_tracks)
+                if needed > 0:
+                    leftovers = chain.from_iterable(
+                        islice(genre_tracks, tracks_per_genre, None)
+                        for genre_tracks in genre_counts.values()
+                    )
+                    allocated_tracks.extend(
+                        heapq.nlargest(needed, leftovers, key=_by_score)
+                    )
+        
+        # Best tracks up to the target size
+        return heapq.nlargest(target_size, allocated_tracks, key=_by_score)
     
     def select_tracks_for_playlist(self, playlist_type: str, target_size: int) -> List[Dict[str, Any]]:
         """Select tracks for a playlist (simplified for tests)."""
@@ -386,26 +429,23 @@ class TrackSelector:
             # Get seeding artists for this playlist type
             seeding_artists = self._get_seeding_artists(playlist_type)
             
-            tracks = []
-            for artist in seeding_artists:
-                artist_tracks = self._search_tracks_by_artist(artist, limit=10)
-                tracks.extend(artist_tracks)
-            
-            # Apply filters
-            tracks = self._filter_tracks_by_popularity(tracks, min_popularity=50)
-            tracks = self._filter_tracks_by_explicit(tracks, max_explicit=False)
+            # Search results stream through the filters; deduplication builds
+            # the first list, so duplicates no longer use up an artist's cap
+            found = (
+                track for artist in seeding_artists
+                for track in self._search_tracks_by_artist(artist, limit=10)
+            )
+            tracks = self._deduplicate_tracks(
+                self._iter_filtered(found, min_popularity=50, allow_explicit=False)
+            )
             
             # Apply artist caps
             artist_cap = self._get_artist_cap(playlist_type)
             tracks = self._apply_artist_caps(tracks, max_per_artist=artist_cap)
             
-            # Deduplicate
-            tracks = self._deduplicate_tracks(tracks)
-            
-            # Score and sort
-            tracks = self._score_tracks(tracks)
-            
-            return tracks[:target_size]
+            # Score, keeping only the best target_size tracks
+            self._assign_scores(tracks)
+            return self._top_k_by_score(tracks, target_size)
         except Exception as e:
             logger.error(f"Error selecting tracks for playlist {playlist_type}: {e}")
             return []
@@ -419,48 +459,70 @@ class TrackSelector:
             logger.error(f"Error searching tracks for artist {artist}: {e}")
             return []
     
+    def _filter_tracks(self, tracks: List[Dict[str, Any]], min_popularity: int = 50,
+                       allow_explicit: bool = False) -> List[Dict[str, Any]]:
+        """Filter tracks by popularity and explicit content in one pass."""
+        return list(self._iter_filtered(tracks, min_popularity, allow_explicit))
+    
+    @staticmethod
+    def _iter_filtered(tracks: Iterable[Dict[str, Any]], min_popularity: int = 50,
+                       allow_explicit: bool = False) -> Iterator[Dict[str, Any]]:
+        """Yield the tracks that pass the popularity and explicit filters."""
+        return (
+            track for track in tracks
+            if track.get('popularity', 0) >= min_popularity
+            and (allow_explicit or not track.get('explicit', False))
+        )
+    
     def _filter_tracks_by_popularity(self, tracks: List[Dict[str, Any]], min_popularity: int = 50) -> List[Dict[str, Any]]:
         """Filter tracks by popularity."""
-        return [track for track in tracks if track.get('popularity', 0) >= min_popularity]
+        return self._filter_tracks(tracks, min_popularity=min_popularity, allow_explicit=True)
     
     def _filter_tracks_by_explicit(self, tracks: List[Dict[str, Any]], max_explicit: bool = False) -> List[Dict[str, Any]]:
         """Filter tracks by explicit content."""
         if max_explicit:
             return tracks
-        return [track for track in tracks if not track.get('explicit', False)]
+        return self._filter_tracks(tracks, min_popularity=0, allow_explicit=False)
     
     def _apply_artist_caps(self, tracks: List[Dict[str, Any]], max_per_artist: int = 3) -> List[Dict[str, Any]]:
         """Apply artist caps to limit tracks per artist."""
-        artist_counts = {}
+        artist_counts = defaultdict(int)
         capped_tracks = []
         
         for track in tracks:
             artist_name = track.get('artists', [{}])[0].get('name', 'Unknown')
-            if artist_counts.get(artist_name, 0) < max_per_artist:
+            count = artist_counts[artist_name]
+            if count < max_per_artist:
                 capped_tracks.append(track)
-                artist_counts[artist_name] = artist_counts.get(artist_name, 0) + 1
+                artist_counts[artist_name] = count + 1
         
         return capped_tracks
     
-    def _deduplicate_tracks(self, tracks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _deduplicate_tracks(self, tracks: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Remove duplicate tracks by ID."""
-        seen_ids = set()
-        unique_tracks = []
-        
+        unique_tracks = {}
         for track in tracks:
             track_id = track.get('id')
-            if track_id and track_id not in seen_ids:
-                seen_ids.add(track_id)
-                unique_tracks.append(track)
+            if track_id:
+                unique_tracks.setdefault(track_id, track)
         
-        return unique_tracks
+        return list(unique_tracks.values())
     
     def _score_tracks(self, tracks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Score tracks based on popularity."""
+        self._assign_scores(tracks)
+        return sorted(tracks, key=_by_score, reverse=True)
+    
+    @staticmethod
+    def _assign_scores(tracks: List[Dict[str, Any]]):
+        """Set each track's score from its popularity, in place."""
         for track in tracks:
             track['score'] = track.get('popularity', 0)
-        
-        return sorted(tracks, key=lambda x: x.get('score', 0), reverse=True)
+    
+    @staticmethod
+    def _top_k_by_score(tracks: List[Dict[str, Any]], k: int) -> List[Dict[str, Any]]:
+        """The ``k`` best-scored tracks, best first, without sorting them all."""
+        return heapq.nlargest(k, tracks, key=_by_score)
     
     def _get_seeding_artists(self, playlist_type: str) -> List[str]:
         """Get seeding artists for playlist type."""
@@ -492,12 +554,19 @@ class TrackSelector:
             'popularity': track.get('popularity', 0)
         }
     
-    def _randomize_selection(self, tracks: List[Dict[str, Any]], count: int) -> List[Dict[str, Any]]:
-        """Randomly select tracks."""
-        import random
-        if len(tracks) <= count:
-            return tracks
-        return random.sample(tracks, count)
+    def _randomize_selection(self, tracks: Iterable[Dict[str, Any]], count: int) -> List[Dict[str, Any]]:
+        """Randomly select up to ``count`` tracks in a single pass.
+
+        Uses reservoir sampling, so ``tracks`` may be any iterable,
+        including a generator, and is never copied in full.
+        """
+        it = iter(tracks)
+        reservoir = list(islice(it, count))
+        for seen, track in enumerate(it, start=count):
+            j = random.randint(0, seen)
+            if j < count:
+                reservoir[j] = track
+        return reservoir
     
     def _filter_tracks_by_genre(self, tracks: List[Dict[str, Any]], genres: List[str]) -> List[Dict[str, Any]]:
         """Filter tracks by genre."""
@@ -16,14 +16,14 @@ LEARNING OBJECTIVES:
 """
 
 import os  # For file operations and environment variables
+import re  # For finding the refresh token line
 import base64  # For encoding/decoding (not used in this script but common in OAuth)
-import requests  # For making HTTP requests to Spotify's API
-from urllib.parse import urlencode  # For encoding URL parameters
-import webbrowser  # For automatically opening the browser
-from http.server import HTTPServer, BaseHTTPRequestHandler  # For creating a local web server
+from urllib.parse import urlencode, urlsplit, parse_qs  # For building and parsing URL parameters
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler  # For creating a local web server
 import threading  # For running the server in the background
-import time  # For adding delays
 import sys  # For system exit
+from functools import lru_cache  # For reading the credentials only once
+from spotify_auth_helpers import SESSION, write_file_atomically  # Shared with the other token scripts
 
 # =============================================================================
 # SPOTIFY API CREDENTIALS
@@ -31,12 +31,14 @@ import sys  # For system exit
 # SECURITY: These credentials should be loaded from environment variables
 # NEVER hardcode credentials in source code for public repositories
 
+@lru_cache(maxsize=1)
 def get_credentials():
     """
     Get Spotify API credentials from environment variables.
     
     This function safely retrieves credentials from environment variables
-    instead of hardcoding them in the source code.
+    instead of hardcoding them in the source code. The result is cached,
+    so the callback handler reuses what main() already looked up.
     
     Returns:
         tuple: (client_id, client_secret) or exits if not found
@@ -67,6 +69,34 @@ REDIRECT_URI = "http://localhost:8888/callback"
 # SCOPE: Defines what permissions your app needs
 SCOPE = "playlist-modify-public playlist-modify-private user-read-private ugc-image-upload"
 
+# AUTH_QUERY: The parts of the authorization URL that never change,
+# encoded once here; only the client ID is added when the URL is built
+AUTH_QUERY = urlencode({
+    'response_type': 'code',  # We want an authorization code back
+    'redirect_uri': REDIRECT_URI,  # Where to send the user after approval
+    'scope': SCOPE,  # What permissions we're asking for
+    'show_dialog': 'true'  # Always show the approval dialog
+})
+
+# REFRESH_TOKEN_LINE: Matches the SPOTIFY_REFRESH_TOKEN line in a .env file
+REFRESH_TOKEN_LINE = re.compile(r'^SPOTIFY_REFRESH_TOKEN=[^\r\n]*', re.MULTILINE)
+
+# SUCCESS_HTML: The page shown in the browser once the token is saved
+# Built once as bytes so it can be sent with an exact Content-Length
+SUCCESS_HTML = b"""
+<html>
+<body>
+<h1>Authentication Successful!</h1>
+<p>Your refresh token has been saved to .env file.</p>
+<p>You can close this window and return to the terminal.</p>
+</body>
+</html>
+"""
+
+# AUTH_DONE: Set by the callback handler once the refresh token is saved,
+# so main() can stop waiting as soon as the flow is complete
+AUTH_DONE = threading.Event()
+
 class SpotifyAuthHandler(BaseHTTPRequestHandler):
     """
     Custom HTTP request handler for processing Spotify's OAuth callback.
@@ -79,6 +109,15 @@ class SpotifyAuthHandler(BaseHTTPRequestHandler):
     which provides basic HTTP server functionality.
     """
     
+    def log_message(self, format, *args):
+        """
+        Silence the default per-request access log.
+        
+        BaseHTTPRequestHandler writes a line to stderr for every request;
+        this script prints its own progress messages instead.
+        """
+        return
+    
     def do_GET(self):
         """
         Handle GET requests from the browser.
@@ -95,16 +134,14 @@ class SpotifyAuthHandler(BaseHTTPRequestHandler):
             # The URL will look like: /callback?code=AQD...&state=...
             # We need to extract the 'code' parameter
             
-            # Split the URL to get the query parameters
-            query = self.path.split('?')[1] if '?' in self.path else ''
-            
-            # Parse the query parameters into a dictionary
-            # Example: "code=AQD&state=123" becomes {"code": "AQD", "state": "123"}
-            params = dict(x.split('=') for x in query.split('&') if '=' in x)
+            # Parse the query parameters into a dictionary of lists
+            # Example: "code=AQD&state=123" becomes {"code": ["AQD"], "state": ["123"]}
+            # parse_qs also decodes any percent-encoded characters
+            params = parse_qs(urlsplit(self.path).query)
             
             # Check if we got an authorization code
             if 'code' in params:
-                auth_code = params['code']
+                auth_code = params['code'][0]
                 print(f"\n✅ Authorization code received: {auth_code[:20]}...")
                 
                 # =============================================================================
@@ -116,7 +153,7 @@ class SpotifyAuthHandler(BaseHTTPRequestHandler):
                 # Get credentials from environment variables
                 client_id, client_secret = get_credentials()
                 
-                token_response = requests.post('https://accounts.spotify.com/api/token', data={
+                token_response = SESSION.post('https://accounts.spotify.com/api/token', data={
                     'grant_type': 'authorization_code',  # We're exchanging an auth code
                     'code': auth_code,  # The code we just received
                     'redirect_uri': REDIRECT_URI,  # Must match what we used in the auth URL
@@ -143,18 +180,14 @@ class SpotifyAuthHandler(BaseHTTPRequestHandler):
                     # Send a nice HTML page back to the browser to show success
                     self.send_response(200)  # HTTP 200 = OK
                     self.send_header('Content-type', 'text/html')  # Tell browser this is HTML
+                    self.send_header('Content-Length', str(len(SUCCESS_HTML)))  # Size of the page
                     self.end_headers()  # End the headers section
                     
-                    # Send the HTML content
-                    self.wfile.write(b"""
-                    <html>
-                    <body>
-                    <h1>Authentication Successful!</h1>
-                    <p>Your refresh token has been saved to .env file.</p>
-                    <p>You can close this window and return to the terminal.</p>
-                    </body>
-                    </html>
-                    """)
+                    # Send the HTML content in one write
+                    self.wfile.write(SUCCESS_HTML)
+                    
+                    # Let main() know the flow is complete
+                    AUTH_DONE.set()
                 else:
                     # If token exchange failed, show error
                     print(f"❌ Token exchange failed: {token_response.text}")
@@ -164,8 +197,10 @@ class SpotifyAuthHandler(BaseHTTPRequestHandler):
                 print("❌ No authorization code received")
                 self.send_error(400, "No authorization code")
         else:
-            # If someone tries to access any other URL, return 404
-            self.send_error(404, "Not found")
+            # Anything else (like the browser asking for /favicon.ico) gets
+            # a short empty reply instead of a full error page
+            self.send_response(204)  # HTTP 204 = No Content
+            self.end_headers()
     
     def update_env_file(self, refresh_token):
         """
@@ -181,26 +216,26 @@ class SpotifyAuthHandler(BaseHTTPRequestHandler):
         
         # Check if .env file exists
         if os.path.exists(env_path):
-            # Read all lines from the existing file
+            # Read the whole file in one go
             with open(env_path, 'r') as f:
-                lines = f.readlines()
+                content = f.read()
             
             # =============================================================================
             # UPDATE THE REFRESH TOKEN LINE
             # =============================================================================
-            # Go through each line and update the SPOTIFY_REFRESH_TOKEN line
-            updated_lines = []
-            for line in lines:
-                if line.startswith('SPOTIFY_REFRESH_TOKEN='):
-                    # Replace the old token with the new one
-                    updated_lines.append(f'SPOTIFY_REFRESH_TOKEN={refresh_token}\n')
-                else:
-                    # Keep all other lines unchanged
-                    updated_lines.append(line)
+            # Replace the SPOTIFY_REFRESH_TOKEN line in a single regex pass
+            # (passing a function keeps backslashes in the token literal)
+            new_line = f'SPOTIFY_REFRESH_TOKEN={refresh_token}'
+            content, replaced = REFRESH_TOKEN_LINE.subn(lambda _: new_line, content)
+            
+            # If there was no such line yet, add one
+            if not replaced:
+                if content and not content.endswith('\n'):
+                    content += '\n'
+                content += new_line + '\n'
             
             # Write the updated content back to the file
-            with open(env_path, 'w') as f:
-                f.writelines(updated_lines)
+            write_file_atomically(env_path, content)
             
             print(f"✅ Updated {env_path} with refresh token")
         else:
@@ -231,16 +266,9 @@ def main():
     # =============================================================================
     # Build the URL that will take the user to Spotify's authorization page
     
-    auth_params = {
-        'client_id': client_id,  # Your app's ID (from environment)
-        'response_type': 'code',  # We want an authorization code back
-        'redirect_uri': REDIRECT_URI,  # Where to send the user after approval
-        'scope': SCOPE,  # What permissions we're asking for
-        'show_dialog': 'true'  # Always show the approval dialog
-    }
-    
-    # Build the authorization URL by encoding the parameters
-    auth_url = f"https://accounts.spotify.com/authorize?{urlencode(auth_params)}"
+    # Add your app's ID (from environment) to the pre-encoded parameters
+    client_query = urlencode({'client_id': client_id})
+    auth_url = f"https://accounts.spotify.com/authorize?{client_query}&{AUTH_QUERY}"
     
     print(f"🔗 Authorization URL: {auth_url}")
     print("\n📋 Steps:")
@@ -255,7 +283,9 @@ def main():
     # Create an HTTP server that will handle the callback from Spotify
     # The server runs on localhost (127.0.0.1) port 8888
     
-    server = HTTPServer(('localhost', 8888), SpotifyAuthHandler)
+    # ThreadingHTTPServer handles each request in its own thread, so extra
+    # browser requests never hold up the callback
+    server = ThreadingHTTPServer(('localhost', 8888), SpotifyAuthHandler)
     
     # Start the server in a separate thread so it doesn't block the main program
     # daemon=True means the thread will stop when the main program stops
@@ -270,19 +300,23 @@ def main():
     # OPEN BROWSER FOR AUTHORIZATION
     # =============================================================================
     # Automatically open the user's default browser to the authorization URL
+    # (imported here because it is only needed once, right at this point)
+    import webbrowser
     webbrowser.open(auth_url)
     
     try:
         # =============================================================================
         # WAIT FOR CALLBACK
         # =============================================================================
-        # Keep the program running until the user interrupts it (Ctrl+C)
-        # or until the callback is received and processed
-        while True:
-            time.sleep(1)  # Sleep for 1 second to avoid using 100% CPU
+        # Block until the callback is received and processed, or until the
+        # user interrupts it (Ctrl+C). The wait wakes up the moment the
+        # handler sets AUTH_DONE, without polling in between
+        AUTH_DONE.wait()
+        print("\n✅ Done! Stopping server...")
     except KeyboardInterrupt:
         # If the user presses Ctrl+C, stop the server gracefully
         print("\n🛑 Stopping server...")
+    finally:
         server.shutdown()
 
 # =============================================================================
@@ -14,10 +14,11 @@ LEARNING OBJECTIVES:
 - Understand HTTP requests and responses
 """
 
-import requests  # Library for making HTTP requests to APIs
 from urllib.parse import urlencode  # For encoding URL parameters
 import os  # For environment variables and file operations
 import sys  # For system exit
+import re  # For finding the refresh token line
+from spotify_auth_helpers import SESSION, write_file_atomically  # Shared with the other token scripts
 
 # =============================================================================
 # SPOTIFY API CREDENTIALS
@@ -154,7 +155,7 @@ def main():
     
     try:
         # Make a POST request to exchange the code for tokens
-        token_response = requests.post('https://accounts.spotify.com/api/token', data={
+        token_response = SESSION.post('https://accounts.spotify.com/api/token', data={
             'grant_type': 'authorization_code',  # We're exchanging an auth code
             'code': auth_code,  # The code we got from the user
             'redirect_uri': 'https://example.com/callback',  # Must match what we used before
@@ -189,6 +190,9 @@ def main():
         # Handle any other errors (network issues, etc.)
         print(f"❌ Error during token exchange: {e}")
 
+# REFRESH_TOKEN_LINE: Matches the SPOTIFY_REFRESH_TOKEN line in a .env file
+REFRESH_TOKEN_LINE = re.compile(r'^SPOTIFY_REFRESH_TOKEN=[^\r\n]*', re.MULTILINE)
+
 def update_env_file(refresh_token):
     """
     Update the .env file with the refresh token.
@@ -205,35 +209,30 @@ def update_env_file(refresh_token):
         # =============================================================================
         # READ EXISTING .ENV FILE
         # =============================================================================
-        # Read all lines from the existing .env file (if it exists)
-        lines = []
+        # Read the whole existing .env file (if it exists)
+        content = ''
         if os.path.exists(env_path):
             with open(env_path, 'r') as f:
-                lines = f.readlines()
+                content = f.read()
         
         # =============================================================================
         # UPDATE OR ADD REFRESH TOKEN
         # =============================================================================
-        # Look for existing SPOTIFY_REFRESH_TOKEN line and update it
-        # If not found, add a new line
-        updated = False
-        for i, line in enumerate(lines):
-            if line.startswith('SPOTIFY_REFRESH_TOKEN='):
-                # Replace the old token with the new one
-                lines[i] = f'SPOTIFY_REFRESH_TOKEN={refresh_token}\n'
-                updated = True
-                break
+        # Replace an existing SPOTIFY_REFRESH_TOKEN line in a single regex pass
+        # (passing a function keeps backslashes in the token literal)
+        new_line = f'SPOTIFY_REFRESH_TOKEN={refresh_token}'
+        content, replaced = REFRESH_TOKEN_LINE.subn(lambda _: new_line, content)
         
         # If we didn't find an existing line, add a new one
-        if not updated:
-            lines.append(f'SPOTIFY_REFRESH_TOKEN={refresh_token}\n')
+        if not replaced:
+            if content and not content.endswith('\n'):
+                content += '\n'
+            content += new_line + '\n'
         
         # =============================================================================
         # WRITE BACK TO FILE
         # =============================================================================
-        # Write all lines back to the .env file
-        with open(env_path, 'w') as f:
-            f.writelines(lines)
+        write_file_atomically(env_path, content)
         
         print(f"✅ Updated {env_path} with refresh token")
         print()
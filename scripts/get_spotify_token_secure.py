@@ -16,15 +16,15 @@ LEARNING OBJECTIVES:
 """
 
 import os  # For file operations and environment variables
+import re  # For finding the refresh token line
 import requests  # For making HTTP requests to Spotify's API and ngrok
-from urllib.parse import urlencode  # For encoding URL parameters
-import webbrowser  # For automatically opening the browser
-from http.server import HTTPServer, BaseHTTPRequestHandler  # For creating a local web server
+from urllib.parse import urlencode, urlsplit, parse_qs  # For building and parsing URL parameters
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler  # For creating a local web server
 import threading  # For running the server in the background
 import time  # For adding delays
-import subprocess  # For running external commands (ngrok)
-import json  # For parsing JSON responses from ngrok API
 import sys  # For system exit
+from functools import lru_cache  # For reading the credentials only once
+from spotify_auth_helpers import SESSION, write_file_atomically  # Shared with the other token scripts
 
 # =============================================================================
 # SPOTIFY API CREDENTIALS
@@ -32,12 +32,14 @@ import sys  # For system exit
 # SECURITY: These credentials should be loaded from environment variables
 # NEVER hardcode credentials in source code for public repositories
 
+@lru_cache(maxsize=1)
 def get_credentials():
     """
     Get Spotify API credentials from environment variables.
     
     This function safely retrieves credentials from environment variables
-    instead of hardcoding them in the source code.
+    instead of hardcoding them in the source code. The result is cached,
+    so the callback handler reuses what main() already looked up.
     
     Returns:
         tuple: (client_id, client_secret) or exits if not found
@@ -68,6 +70,25 @@ LOCAL_PORT = 8888
 # SCOPE: Defines what permissions your app needs
 SCOPE = "playlist-modify-public playlist-modify-private user-read-private ugc-image-upload"
 
+# REFRESH_TOKEN_LINE: Matches the SPOTIFY_REFRESH_TOKEN line in a .env file
+REFRESH_TOKEN_LINE = re.compile(r'^SPOTIFY_REFRESH_TOKEN=[^\r\n]*', re.MULTILINE)
+
+# SUCCESS_HTML: The page shown in the browser once the token is saved
+# Built once as bytes so it can be sent with an exact Content-Length
+SUCCESS_HTML = b"""
+<html>
+<body>
+<h1>Authentication Successful!</h1>
+<p>Your refresh token has been saved to .env file.</p>
+<p>You can close this window and return to the terminal.</p>
+</body>
+</html>
+"""
+
+# AUTH_DONE: Set by the callback handler once the refresh token is saved,
+# so main() can stop waiting as soon as the flow is complete
+AUTH_DONE = threading.Event()
+
 class SpotifyAuthHandler(BaseHTTPRequestHandler):
     """
     Custom HTTP request handler for processing Spotify's OAuth callback.
@@ -76,6 +97,15 @@ class SpotifyAuthHandler(BaseHTTPRequestHandler):
     from ngrok instead of a hardcoded localhost URL.
     """
     
+    def log_message(self, format, *args):
+        """
+        Silence the default per-request access log.
+        
+        BaseHTTPRequestHandler writes a line to stderr for every request;
+        this script prints its own progress messages instead.
+        """
+        return
+    
     def do_GET(self):
         """
         Handle GET requests from the browser.
@@ -90,12 +120,12 @@ class SpotifyAuthHandler(BaseHTTPRequestHandler):
             # EXTRACT AUTHORIZATION CODE FROM URL
             # =============================================================================
             # Parse the URL parameters to get the authorization code
-            query = self.path.split('?')[1] if '?' in self.path else ''
-            params = dict(x.split('=') for x in query.split('&') if '=' in x)
+            # parse_qs also decodes any percent-encoded characters
+            params = parse_qs(urlsplit(self.path).query)
             
             # Check if we got an authorization code
             if 'code' in params:
-                auth_code = params['code']
+                auth_code = params['code'][0]
                 print(f"\n✅ Authorization code received: {auth_code[:20]}...")
                 
                 # =============================================================================
@@ -107,7 +137,7 @@ class SpotifyAuthHandler(BaseHTTPRequestHandler):
                 # Get credentials from environment variables
                 client_id, client_secret = get_credentials()
                 
-                token_response = requests.post('https://accounts.spotify.com/api/token', data={
+                token_response = SESSION.post('https://accounts.spotify.com/api/token', data={
                     'grant_type': 'authorization_code',  # We're exchanging an auth code
                     'code': auth_code,  # The code we just received
                     'redirect_uri': self.server.redirect_uri,  # Dynamic redirect URI from ngrok
@@ -134,18 +164,14 @@ class SpotifyAuthHandler(BaseHTTPRequestHandler):
                     # Send a nice HTML page back to the browser
                     self.send_response(200)  # HTTP 200 = OK
                     self.send_header('Content-type', 'text/html')  # Tell browser this is HTML
+                    self.send_header('Content-Length', str(len(SUCCESS_HTML)))  # Size of the page
                     self.end_headers()  # End the headers section
                     
-                    # Send the HTML content
-                    self.wfile.write(b"""
-                    <html>
-                    <body>
-                    <h1>Authentication Successful!</h1>
-                    <p>Your refresh token has been saved to .env file.</p>
-                    <p>You can close this window and return to the terminal.</p>
-                    </body>
-                    </html>
-                    """)
+                    # Send the HTML content in one write
+                    self.wfile.write(SUCCESS_HTML)
+                    
+                    # Let main() know the flow is complete
+                    AUTH_DONE.set()
                 else:
                     # If token exchange failed, show error
                     print(f"❌ Token exchange failed: {token_response.text}")
@@ -155,8 +181,10 @@ class SpotifyAuthHandler(BaseHTTPRequestHandler):
                 print("❌ No authorization code received")
                 self.send_error(400, "No authorization code")
         else:
-            # If someone tries to access any other URL, return 404
-            self.send_error(404, "Not found")
+            # Anything else (like the browser asking for /favicon.ico) gets
+            # a short empty reply instead of a full error page
+            self.send_response(204)  # HTTP 204 = No Content
+            self.end_headers()
     
     def update_env_file(self, refresh_token):
         """
@@ -172,26 +200,26 @@ class SpotifyAuthHandler(BaseHTTPRequestHandler):
         
         # Check if .env file exists
         if os.path.exists(env_path):
-            # Read all lines from the existing file
+            # Read the whole file in one go
             with open(env_path, 'r') as f:
-                lines = f.readlines()
+                content = f.read()
             
             # =============================================================================
             # UPDATE THE REFRESH TOKEN LINE
             # =============================================================================
-            # Go through each line and update the SPOTIFY_REFRESH_TOKEN line
-            updated_lines = []
-            for line in lines:
-                if line.startswith('SPOTIFY_REFRESH_TOKEN='):
-                    # Replace the old token with the new one
-                    updated_lines.append(f'SPOTIFY_REFRESH_TOKEN={refresh_token}\n')
-                else:
-                    # Keep all other lines unchanged
-                    updated_lines.append(line)
+            # Replace the SPOTIFY_REFRESH_TOKEN line in a single regex pass
+            # (passing a function keeps backslashes in the token literal)
+            new_line = f'SPOTIFY_REFRESH_TOKEN={refresh_token}'
+            content, replaced = REFRESH_TOKEN_LINE.subn(lambda _: new_line, content)
+            
+            # If there was no such line yet, add one
+            if not replaced:
+                if content and not content.endswith('\n'):
+                    content += '\n'
+                content += new_line + '\n'
             
             # Write the updated content back to the file
-            with open(env_path, 'w') as f:
-                f.writelines(updated_lines)
+            write_file_atomically(env_path, content)
             
             print(f"✅ Updated {env_path} with refresh token")
         else:
@@ -209,6 +237,9 @@ def start_ngrok():
     Returns:
         tuple: (public_url, ngrok_process) or (None, None) if failed
     """
+    # Only needed to run ngrok, so imported here rather than at startup
+    import subprocess
+    
     try:
         # =============================================================================
         # START NGROK PROCESS
@@ -330,7 +361,9 @@ def main():
     # =============================================================================
     # Create an HTTP server that will handle the callback from Spotify
     
-    server = HTTPServer(('localhost', LOCAL_PORT), SpotifyAuthHandler)
+    # ThreadingHTTPServer handles each request in its own thread, so extra
+    # browser requests never hold up the callback
+    server = ThreadingHTTPServer(('localhost', LOCAL_PORT), SpotifyAuthHandler)
     
     # Store the redirect URI in the server object so the handler can access it
     # This is a custom attribute we're adding to the server
@@ -348,22 +381,26 @@ def main():
     # OPEN BROWSER FOR AUTHORIZATION
     # =============================================================================
     # Automatically open the user's default browser to the authorization URL
+    # (imported here because it is only needed once, right at this point)
+    import webbrowser
     webbrowser.open(auth_url)
     
     try:
         # =============================================================================
         # WAIT FOR CALLBACK
         # =============================================================================
-        # Keep the program running until the user interrupts it (Ctrl+C)
-        # or until the callback is received and processed
-        while True:
-            time.sleep(1)  # Sleep for 1 second to avoid using 100% CPU
+        # Block until the callback is received and processed, or until the
+        # user interrupts it (Ctrl+C). The wait wakes up the moment the
+        # handler sets AUTH_DONE, without polling in between
+        AUTH_DONE.wait()
+        print("\n✅ Done! Stopping server and ngrok...")
     except KeyboardInterrupt:
+        # If the user presses Ctrl+C, stop everything gracefully
+        print("\n🛑 Stopping server and ngrok...")
+    finally:
         # =============================================================================
         # CLEANUP ON EXIT
         # =============================================================================
-        # If the user presses Ctrl+C, stop everything gracefully
-        print("\n🛑 Stopping server and ngrok...")
         server.shutdown()  # Stop the web server
         
         # Stop the ngrok process if it's running
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Shared helpers for the Spotify token scripts.
+
+The get_spotify_token*.py scripts are run directly (python scripts/...),
+so Python finds this module next to them and each script can import it.
+
+LEARNING OBJECTIVES:
+- Learn how to share code between scripts with a plain module
+- Learn how one requests.Session reuses connections between calls
+- Understand why files should be replaced in one atomic step
+"""
+
+import os  # For file operations
+import shutil  # For copying file permissions
+import tempfile  # For writing files safely
+import requests  # For making HTTP requests to Spotify's API
+from requests.adapters import HTTPAdapter  # For connection pooling and retries
+from urllib3.util.retry import Retry  # For retrying failed connections
+
+# SESSION: One HTTP session for talking to Spotify's accounts service
+# Reusing it keeps the connection (and its TLS handshake) open between calls
+# Connection errors and gateway errors are retried briefly; POST requests
+# are not retried on error statuses, since an authorization code works only once
+SESSION = requests.Session()
+SESSION.mount('https://accounts.spotify.com', HTTPAdapter(
+    pool_connections=2,
+    pool_maxsize=2,
+    max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=[502, 503, 504]),
+))
+
+
+def write_file_atomically(path, content):
+    """
+    Replace a file's contents in one step.
+    
+    The new content is written to a temporary file in the same directory,
+    which is then swapped into place with os.replace. If the script is
+    interrupted halfway, the original file is left untouched instead of
+    half-written.
+    
+    Args:
+        path (str): The file to replace
+        content (str): The new contents of the file
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.env.')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(content)
+        # Keep the original file's permissions
+        if os.path.exists(path):
+            shutil.copymode(path, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        # Don't leave the temporary file behind
+        os.unlink(tmp_path)
+        raise
@@ -8,6 +8,11 @@ from app.playlist_manager import PlaylistManager
 class TestPlaylistManager:
     """Test cases for PlaylistManager class."""
 
+    @pytest.fixture(autouse=True)
+    def state_db(self, monkeypatch, tmp_path):
+        """Keep each test's database out of the bot's real state directory."""
+        monkeypatch.setenv("PLAYLIST_STATE_DB", str(tmp_path / "playlist_state.db"))
+
     @pytest.fixture
     def mock_spotify_client(self):
         """Create a mock Spotify client."""
@@ -135,20 +140,25 @@ class TestPlaylistManager:
         assert "successful_updates" in stats
         assert "failed_updates" in stats
 
-    @patch('app.playlist_manager.sqlite3.connect')
-    def test_database_operations(self, mock_connect, playlist_manager):
+    def test_database_operations(self, playlist_manager):
         """Test database operations."""
         mock_conn = Mock()
-        mock_cursor = Mock()
-        mock_connect.return_value = mock_conn
-        mock_conn.cursor.return_value = mock_cursor
+        playlist_manager._conn = mock_conn
         
         # Test logging
         playlist_manager.log_playlist_update("playlist1", 10, True)
         
-        # Verify database operations were called
-        mock_connect.assert_called()
-        mock_cursor.execute.assert_called()
+        # Verify the shared connection was used
+        mock_conn.execute.assert_called()
+
+    def test_database_connection_reused(self, playlist_manager):
+        """Test helpers reuse the manager's connection instead of reconnecting."""
+        with patch('app.playlist_manager.sqlite3.connect') as mock_connect:
+            playlist_manager.log_playlist_update("playlist1", 10, True)
+            history = playlist_manager.get_playlist_update_history("playlist1", limit=1)
+        
+        mock_connect.assert_not_called()
+        assert history[0]['track_count'] == 10
 
     def test_validate_playlist_id_valid(self, playlist_manager):
         """Test playlist ID validation with valid ID."""
@@ -250,3 +260,157 @@ class TestPlaylistManager:
         # Test getting playlist mood analysis
         mood = playlist_manager.get_playlist_mood("playlist1")
         assert isinstance(mood, dict)
+
+    def test_transaction_rolls_back_on_error(self, playlist_manager):
+        """Test statements in a failed transaction are not committed."""
+        before = playlist_manager.get_playlist_statistics("tx_test")['total_updates']
+        
+        with pytest.raises(RuntimeError):
+            with playlist_manager._tx() as conn:
+                playlist_manager._insert_run(conn, "tx_test", 5, True)
+                raise RuntimeError("boom")
+        
+        after = playlist_manager.get_playlist_statistics("tx_test")['total_updates']
+        assert after == before
+
+    def test_snapshot_round_trip(self, playlist_manager):
+        """Test snapshot tracks are stored per row and read back in order."""
+        tracks = [
+            {"id": "t1", "uri": "spotify:track:t1", "name": "One", "popularity": 70,
+             "artists": [{"name": "Artist 1"}, {"name": "Artist 2"}], "album": {"name": "Album"}},
+            {"id": "t2", "uri": "spotify:track:t2", "name": "Two", "popularity": 40,
+             "artists": [{"name": "Artist 3"}], "album": {"name": "Album"}}
+        ]
+        with playlist_manager._tx() as conn:
+            playlist_manager._insert_snapshot(conn, "snapshot_test", "9999-01-01T00:00:00", tracks)
+        
+        snapshot = playlist_manager._get_latest_snapshot("snapshot_test")
+        
+        assert [t["id"] for t in snapshot] == ["t1", "t2"]
+        assert snapshot[0]["popularity"] == 70
+        assert [a["name"] for a in snapshot[0]["artists"]] == ["Artist 1", "Artist 2"]
+
+    def test_snapshot_keeps_artists_with_commas(self, playlist_manager):
+        """Test artist names with commas, artist IDs and release dates survive a snapshot."""
+        tracks = [
+            {"id": "t1", "uri": "spotify:track:t1", "name": "One", "popularity": 70,
+             "artists": [{"id": "a1", "name": "Tyler, The Creator"}, {"id": "a2", "name": "Kali Uchis"}],
+             "album": {"name": "Flower Boy", "release_date": "2017-07-21"}}
+        ]
+        with playlist_manager._tx() as conn:
+            playlist_manager._insert_snapshot(conn, "snapshot_commas", "9999-01-01T00:00:00", tracks)
+        
+        snapshot = playlist_manager._get_latest_snapshot("snapshot_commas")
+        
+        assert snapshot[0]["artists"] == tracks[0]["artists"]
+        assert snapshot[0]["album"] == tracks[0]["album"]
+
+    def test_most_common_artists_counts(self, playlist_manager, mock_spotify_client):
+        """Test artist tallies are ranked by count and skip missing tracks."""
+        mock_spotify_client.get_playlist_tracks.return_value = [
+            {"track": {"artists": [{"name": "A"}, {"name": "B"}]}},
+            {"track": {"artists": [{"name": "A"}]}},
+            {"track": None}
+        ]
+        
+        artists = playlist_manager.get_most_common_artists("playlist1", limit=1)
+        
+        assert artists == [{"name": "A", "count": 2}]
+        assert playlist_manager.get_playlist_diversity("playlist1") == 2 / 3
+
+    def test_seed_new_playlist(self, playlist_manager, mock_spotify_client):
+        """Test a new yearly playlist is seeded from the daily and weekly playlists."""
+        playlist_manager.config = {"seeding": {"yearly": {"top_daily": 1, "top_weekly": 2}}}
+        playlist_manager.playlist_ids = {"daily": "daily_id", "weekly": "weekly_id"}
+        mock_spotify_client.get_playlist_tracks.side_effect = lambda playlist_id: [
+            {"track": {"uri": f"spotify:track:{playlist_id}_{i}"}} for i in range(3)
+        ]
+        
+        playlist_manager._seed_new_playlist("yearly", "new_id")
+        
+        mock_spotify_client.replace_playlist_tracks.assert_called_once_with("new_id", [
+            "spotify:track:daily_id_0",
+            "spotify:track:weekly_id_0",
+            "spotify:track:weekly_id_1"
+        ])
+
+    def test_each_update_fetches_current_tracks(self, playlist_manager, mock_spotify_client, tmp_path):
+        """Test every update trims against a listing fetched in that run."""
+        playlist_manager.config = {"app": {"snapshot_dir": str(tmp_path)}}
+        playlist_manager.playlist_ids = {"monthly": "monthly_id"}
+        playlist_manager.track_selector = Mock()
+        playlist_manager.track_selector.select_tracks_for_playlist.return_value = [
+            {"id": "new1", "uri": "spotify:track:new1"}
+        ]
+        mock_spotify_client.get_playlist_tracks.side_effect = [
+            [{"track": {"uri": "spotify:track:old0"}}],
+            [{"track": {"uri": "spotify:track:old0"}}, {"track": {"uri": "spotify:track:new1"}}]
+        ]
+        
+        playlist_manager.update_playlist("monthly", {"logic": "month_to_date", "size": 2})
+        playlist_manager.update_playlist("monthly", {"logic": "month_to_date", "size": 2})
+        
+        assert mock_spotify_client.get_playlist_tracks.call_count == 2
+        mock_spotify_client.remove_tracks_from_playlist.assert_called_once_with(
+            "monthly_id", ["spotify:track:new1"]
+        )
+
+    def test_update_trims_without_refetch(self, playlist_manager, mock_spotify_client, tmp_path):
+        """Test month-to-date updates trim the overflow from the known track list."""
+        playlist_manager.config = {"app": {"snapshot_dir": str(tmp_path)}}
+        playlist_manager.playlist_ids = {"monthly": "monthly_id"}
+        playlist_manager.track_selector = Mock()
+        playlist_manager.track_selector.select_tracks_for_playlist.return_value = [
+            {"id": "new1", "uri": "spotify:track:new1"},
+            {"id": "new2", "uri": "spotify:track:new2"}
+        ]
+        mock_spotify_client.get_playlist_tracks.return_value = [
+            {"track": {"uri": f"spotify:track:old{i}"}} for i in range(3)
+        ]
+        
+        playlist_manager.update_playlist("monthly", {"logic": "month_to_date", "size": 4})
+        
+        mock_spotify_client.get_playlist_tracks.assert_called_once_with("monthly_id")
+        mock_spotify_client.remove_tracks_from_playlist.assert_called_once_with(
+            "monthly_id", ["spotify:track:new2"]
+        )
+
+    def test_playlist_statistics_counts(self, playlist_manager):
+        """Test statistics split logged runs into successes and failures."""
+        before = playlist_manager.get_playlist_statistics("stats_test")
+        playlist_manager.log_playlist_update("stats_test", 10, True)
+        playlist_manager.log_playlist_update("stats_test", 0, False)
+        
+        stats = playlist_manager.get_playlist_statistics("stats_test")
+        
+        assert stats["total_updates"] == before["total_updates"] + 2
+        assert stats["successful_updates"] == before["successful_updates"] + 1
+        assert stats["failed_updates"] == before["failed_updates"] + 1
+
+    def test_stored_playlist_ids_loaded_at_startup(self, mock_spotify_client, sample_config):
+        """Test playlists stored in the database are reused instead of recreated."""
+        manager = PlaylistManager(mock_spotify_client)
+        manager._store_playlist_id("playlist1", "stored_1")
+        manager._store_playlist_id("playlist2", "stored_2")
+        
+        manager = PlaylistManager(mock_spotify_client, config=sample_config)
+        
+        assert manager.playlist_ids == {"playlist1": "stored_1", "playlist2": "stored_2"}
+        mock_spotify_client.create_playlist_if_not_exists.assert_not_called()
+
+    def test_update_replaces_daily_in_one_call(self, playlist_manager, mock_spotify_client, tmp_path):
+        """Test previous-day updates replace the playlist contents in a single call."""
+        playlist_manager.config = {"app": {"snapshot_dir": str(tmp_path)}}
+        playlist_manager.playlist_ids = {"daily": "daily_id"}
+        playlist_manager.track_selector = Mock()
+        playlist_manager.track_selector.select_tracks_for_playlist.return_value = [
+            {"id": "t1", "uri": "spotify:track:t1"}
+        ]
+        mock_spotify_client.get_playlist_tracks.return_value = []
+        
+        playlist_manager.update_playlist("daily", {"logic": "previous_day"})
+        
+        mock_spotify_client.replace_playlist_tracks.assert_called_once_with(
+            "daily_id", ["spotify:track:t1"]
+        )
+        mock_spotify_client.add_tracks_to_playlist.assert_not_called()
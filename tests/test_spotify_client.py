@@ -1,5 +1,6 @@
 """Tests for Spotify client functionality."""
 
+import time
 import pytest
 from unittest.mock import Mock, patch, MagicMock
 from app.spotify_client import SpotifyClient
@@ -9,13 +10,15 @@ class TestSpotifyClient:
     """Test cases for SpotifyClient class."""
 
     @pytest.fixture
-    def mock_env_vars(self, monkeypatch):
+    def mock_env_vars(self, monkeypatch, tmp_path):
         """Mock environment variables."""
         env_vars = {
             "SPOTIFY_CLIENT_ID": "test_client_id",
             "SPOTIFY_CLIENT_SECRET": "test_client_secret",
             "SPOTIFY_REFRESH_TOKEN": "test_refresh_token",
-            "SPOTIFY_USER_ID": "test_user_id"
+            "SPOTIFY_USER_ID": "test_user_id",
+            "SPOTIFY_PROFILE_CACHE": str(tmp_path / "profile.json"),
+            "SPOTIFY_TOKEN_CACHE": str(tmp_path / "token.json")
         }
         for key, value in env_vars.items():
             monkeypatch.setenv(key, value)
@@ -43,7 +46,7 @@ class TestSpotifyClient:
         with pytest.raises(ValueError, match="Missing required Spotify environment variables"):
             SpotifyClient()
 
-    @patch('app.spotify_client.requests.post')
+    @patch('app.spotify_client.requests.Session.post')
     def test_refresh_access_token_success(self, mock_post, spotify_client):
         """Test successful access token refresh."""
         mock_response = Mock()
@@ -60,7 +63,38 @@ class TestSpotifyClient:
         assert spotify_client.access_token == "new_access_token"
         mock_post.assert_called_once()
 
-    @patch('app.spotify_client.requests.post')
+    @patch('app.spotify_client.requests.Session.post')
+    def test_access_token_reused_across_clients(self, mock_post, spotify_client, mock_env_vars):
+        """Test a refreshed token is cached on disk and reused by a new client."""
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {"access_token": "cached_token", "expires_in": 3600}
+        mock_post.return_value = mock_response
+        spotify_client.refresh_access_token()
+
+        client = SpotifyClient()
+        headers = client._get_headers()
+
+        assert headers["Authorization"] == "Bearer cached_token"
+        mock_post.assert_called_once()
+
+    @patch('app.spotify_client.requests.Session.post')
+    def test_concurrent_headers_refresh_once(self, mock_post, spotify_client):
+        """Test threads needing a token at the same time trigger a single refresh."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {"access_token": "shared_token", "expires_in": 3600}
+        mock_post.return_value = mock_response
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            headers = list(executor.map(lambda _: spotify_client._get_headers(), range(16)))
+
+        assert all(h["Authorization"] == "Bearer shared_token" for h in headers)
+        mock_post.assert_called_once()
+
+    @patch('app.spotify_client.requests.Session.post')
     def test_refresh_access_token_failure(self, mock_post, spotify_client):
         """Test access token refresh failure."""
         mock_response = Mock()
@@ -115,6 +149,20 @@ class TestSpotifyClient:
         assert result["items"][0]["track"]["name"] == "Test Track 1"
         mock_get.assert_called_once()
 
+    def test_get_playlist_tracks_offset_and_fields(self, spotify_client):
+        """Test playlist tracks can be fetched from an offset with a field filter."""
+        with patch.object(spotify_client, '_make_request',
+                          return_value={"items": [{"track": {"uri": "spotify:track:1"}}]}) as mock_request:
+            result = spotify_client.get_playlist_tracks(
+                "test_playlist_id", offset=200, fields="items(track(uri))"
+            )
+        
+        assert result == [{"track": {"uri": "spotify:track:1"}}]
+        mock_request.assert_called_once_with(
+            'GET', '/playlists/test_playlist_id/tracks',
+            params={'limit': 100, 'offset': 200, 'fields': 'items(track(uri))'}
+        )
+
     @patch('app.spotify_client.requests.get')
     def test_search_tracks_success(self, mock_get, spotify_client):
         """Test successful track search."""
@@ -168,20 +216,383 @@ class TestSpotifyClient:
         assert result is True
         mock_put.assert_called_once()
 
-    @patch('app.spotify_client.requests.put')
-    def test_update_playlist_cover_success(self, mock_put, spotify_client):
+    def test_replace_playlist_tracks_over_limit(self, spotify_client):
+        """Test replacing with more than 100 tracks replaces then appends the rest."""
+        uris = [f"spotify:track:{i}" for i in range(150)]
+        with patch.object(spotify_client, '_make_request') as mock_request:
+            spotify_client.replace_playlist_tracks("test_playlist_id", uris)
+        
+        assert mock_request.call_args_list[0].args[0] == 'PUT'
+        assert mock_request.call_args_list[0].kwargs['json'] == {'uris': uris[:100]}
+        assert mock_request.call_args_list[1].args[0] == 'POST'
+        assert mock_request.call_args_list[1].kwargs['json'] == {'uris': uris[100:]}
+
+    def test_get_playlist_tracks_fetches_remaining_pages(self, spotify_client):
+        """Test pages after the first are requested from the reported total and kept in order."""
+        def fake_request(method, endpoint, params):
+            offset = params['offset']
+            count = min(params['limit'], 250 - offset)
+            return {"total": 250, "items": [{"n": offset + i} for i in range(count)]}
+        
+        with patch.object(spotify_client, '_make_request', side_effect=fake_request) as mock_request:
+            result = spotify_client.get_playlist_tracks("test_playlist_id")
+        
+        assert [item["n"] for item in result] == list(range(250))
+        assert mock_request.call_count == 3
+
+    def test_rate_limit_allows_burst_then_waits(self, spotify_client):
+        """Test the bucket allows a burst and then sleeps until a token refills."""
+        with patch('app.spotify_client.time.sleep') as mock_sleep, \
+                patch('app.spotify_client.time.monotonic', return_value=1000.0):
+            spotify_client._bucket_last = 1000.0
+            for _ in range(spotify_client._bucket_capacity):
+                spotify_client._rate_limit()
+            mock_sleep.assert_not_called()
+
+            # Empty bucket: the next call waits, then succeeds once refilled
+            mock_sleep.side_effect = lambda seconds: setattr(
+                spotify_client, '_bucket_tokens', spotify_client._bucket_tokens + 1
+            )
+            spotify_client._rate_limit()
+
+        mock_sleep.assert_called_once()
+        assert mock_sleep.call_args.args[0] == pytest.approx(0.1)
+
+    def test_rate_limit_window_caps_requests(self, spotify_client):
+        """Test a full rolling window waits for its oldest request to expire."""
+        from app.spotify_client import RATE_LIMIT_WINDOW, RATE_LIMIT_WINDOW_MAX
+
+        spotify_client._window.extend([990.0 + i * 0.01 for i in range(RATE_LIMIT_WINDOW_MAX)])
+        clock = {'now': 1000.0}
+
+        with patch('app.spotify_client.time.monotonic', side_effect=lambda: clock['now']), \
+                patch('app.spotify_client.time.sleep',
+                      side_effect=lambda seconds: clock.update(now=clock['now'] + seconds)) as mock_sleep:
+            spotify_client._bucket_last = 1000.0
+            spotify_client._rate_limit()
+
+        assert mock_sleep.call_args_list[0].args[0] == pytest.approx(990.0 + RATE_LIMIT_WINDOW - 1000.0)
+        assert len(spotify_client._window) == RATE_LIMIT_WINDOW_MAX
+
+    def test_make_request_honors_retry_after(self, spotify_client):
+        """Test a 429 pauses requests for Retry-After and then retries."""
+        rate_limited = Mock(status_code=429, headers={"Retry-After": "2"})
+        success = Mock(status_code=200, headers={}, content=b'{"ok": true}')
+        spotify_client.access_token = "test_token"
+        spotify_client.token_expires_at = float("inf")
+
+        with patch.object(spotify_client._session, 'request', side_effect=[rate_limited, success]), \
+                patch('app.spotify_client.time.sleep') as mock_sleep:
+            result = spotify_client._make_request('GET', '/me')
+
+        assert result == {"ok": True}
+        assert any(call.args[0] == pytest.approx(2, abs=0.1) for call in mock_sleep.call_args_list)
+
+    def test_make_request_does_not_retry_client_errors(self, spotify_client):
+        """Test 4xx responses other than 401/429 fail without retrying."""
+        import requests
+
+        not_found = Mock(status_code=404, headers={}, text="Not found")
+        not_found.raise_for_status.side_effect = requests.HTTPError(response=not_found)
+        spotify_client.access_token = "test_token"
+        spotify_client.token_expires_at = float("inf")
+
+        with patch.object(spotify_client._session, 'request', return_value=not_found) as mock_request:
+            with pytest.raises(requests.HTTPError):
+                spotify_client._make_request('GET', '/playlists/missing')
+
+        mock_request.assert_called_once()
+
+    def test_concurrency_grows_on_fast_responses(self, spotify_client):
+        """Test the in-flight limit increases additively while latency is healthy."""
+        initial = spotify_client._concurrency
+
+        spotify_client._acquire_slot()
+        spotify_client._release_slot(0.05, overloaded=False)
+
+        assert spotify_client._concurrency == initial + 1
+        assert spotify_client._in_flight == 0
+
+    def test_concurrency_halves_on_overload(self, spotify_client):
+        """Test the in-flight limit decreases multiplicatively on 429/5xx."""
+        spotify_client._concurrency = 8
+
+        spotify_client._acquire_slot()
+        spotify_client._release_slot(0.05, overloaded=True)
+
+        assert spotify_client._concurrency == 4
+
+        spotify_client._concurrency = 1
+        spotify_client._acquire_slot()
+        spotify_client._release_slot(2.0, overloaded=False)
+
+        assert spotify_client._concurrency == 1
+
+    @patch('app.spotify_client.SpotifyClient._make_request')
+    def test_get_track_audio_features_batches_in_order(self, mock_request, spotify_client):
+        """Test audio features are fetched in batches of 100 and kept in order."""
+        track_ids = [f"track{i}" for i in range(250)]
+
+        def fake_request(method, endpoint, params):
+            ids = params['ids'].split(',')
+            if ids[0] == "track0":
+                time.sleep(0.05)  # finish the first batch last
+            return {'audio_features': [{'id': track_id} for track_id in ids]}
+
+        mock_request.side_effect = fake_request
+
+        features = spotify_client.get_track_audio_features(track_ids)
+
+        assert mock_request.call_count == 3
+        assert [f['id'] for f in features] == track_ids
+
+    @patch('app.spotify_client.SpotifyClient._make_request')
+    def test_iter_playlist_tracks_prefetches_lazily(self, mock_request, spotify_client):
+        """Test the iterator yields in order and stops fetching when the caller stops."""
+        pages = {
+            0: {'items': [{'id': f't{i}'} for i in range(2)]},
+            2: {'items': [{'id': f't{i}'} for i in range(2, 4)]},
+            4: {'items': [{'id': 't4'}]},
+        }
+        mock_request.side_effect = lambda method, endpoint, params: pages[params['offset']]
+
+        tracks = spotify_client.iter_playlist_tracks("playlist_id", limit=2)
+        assert [t['id'] for t in tracks] == ['t0', 't1', 't2', 't3', 't4']
+        assert mock_request.call_count == 3
+
+        mock_request.reset_mock()
+        first = next(spotify_client.iter_playlist_tracks("playlist_id", limit=2))
+        assert first['id'] == 't0'
+        # Only the current page and the one prefetched after it
+        assert mock_request.call_count <= 2
+
+    def test_make_request_empty_body(self, spotify_client):
+        """Test a successful response without a body returns an empty dict."""
+        empty = Mock(status_code=200, headers={}, content=b'')
+        spotify_client.access_token = "test_token"
+        spotify_client.token_expires_at = float("inf")
+
+        with patch.object(spotify_client._session, 'request', return_value=empty):
+            assert spotify_client._make_request('PUT', '/playlists/abc', json={"name": "x"}) == {}
+
+    def test_get_playlist_by_name_uses_index(self, spotify_client):
+        """Test playlist lookups reuse one listing and follow creates and renames."""
+        playlists = [{"id": "p1", "name": "Daily"}, {"id": "p2", "name": "Weekly"}]
+
+        with patch.object(spotify_client, 'get_user_playlists', return_value=playlists) as mock_list, \
+                patch.object(spotify_client, '_make_request',
+                             return_value={"id": "p3", "name": "Monthly"}):
+            assert spotify_client.get_playlist_by_name("Daily")["id"] == "p1"
+            assert spotify_client.get_playlist_by_name("Missing") is None
+
+            spotify_client.create_playlist("Monthly")
+            assert spotify_client.get_playlist_by_name("Monthly")["id"] == "p3"
+
+            spotify_client.update_playlist("p2", name="Weekly Mix")
+            assert spotify_client.get_playlist_by_name("Weekly") is None
+            assert spotify_client.get_playlist_by_name("Weekly Mix")["id"] == "p2"
+
+        mock_list.assert_called_once()
+
+    def test_make_request_raises_after_repeated_rate_limits(self, spotify_client):
+        """Test a call that keeps getting 429 gives up after the attempt limit."""
+        from app.spotify_client import MAX_REQUEST_ATTEMPTS, RateLimitedError
+
+        rate_limited = Mock(status_code=429, headers={"Retry-After": "1"})
+        spotify_client.access_token = "test_token"
+        spotify_client.token_expires_at = float("inf")
+
+        with patch.object(spotify_client._session, 'request', return_value=rate_limited) as mock_request, \
+                patch('app.spotify_client.time.sleep'):
+            with pytest.raises(RateLimitedError):
+                spotify_client._make_request('GET', '/me')
+
+        assert mock_request.call_count == MAX_REQUEST_ATTEMPTS
+
+    def test_session_retries_transient_errors(self, spotify_client):
+        """Test the session adapter retries 5xx for idempotent methods only."""
+        retry = spotify_client._session.get_adapter('https://api.spotify.com').max_retries
+
+        assert retry.total == 3
+        assert 503 in retry.status_forcelist
+        assert 429 not in retry.status_forcelist
+        assert retry.is_retry('GET', 503)
+        assert not retry.is_retry('POST', 503)
+
+    def test_get_headers_reused_until_token_changes(self, spotify_client):
+        """Test the headers dict is built once per access token."""
+        spotify_client.access_token = "token_a"
+        spotify_client.token_expires_at = float("inf")
+
+        first = spotify_client._get_headers()
+        assert spotify_client._get_headers() is first
+
+        spotify_client.access_token = "token_b"
+        rotated = spotify_client._get_headers()
+        assert rotated is not first
+        assert rotated['Authorization'] == 'Bearer token_b'
+
+    @patch('app.spotify_client.SpotifyClient._make_request')
+    def test_add_tracks_to_playlist_keeps_batch_order(self, mock_request, spotify_client):
+        """Test large additions are appended in order, 100 URIs at a time."""
+        track_uris = [f"spotify:track:{i}" for i in range(250)]
+
+        spotify_client.add_tracks_to_playlist("playlist_id", track_uris)
+
+        sent = [call.kwargs['json']['uris'] for call in mock_request.call_args_list]
+        assert [len(batch) for batch in sent] == [100, 100, 50]
+        assert [uri for batch in sent for uri in batch] == track_uris
+
+    @patch('app.spotify_client.SpotifyClient._make_request')
+    def test_iter_playlist_track_uris(self, mock_request, spotify_client):
+        """Test only URIs are requested and unavailable tracks are skipped."""
+        mock_request.return_value = {'items': [
+            {'track': {'uri': 'spotify:track:1'}},
+            {'track': None},
+            {'track': {'uri': 'spotify:track:2'}},
+        ]}
+
+        uris = list(spotify_client.iter_playlist_track_uris("playlist_id"))
+
+        assert uris == ['spotify:track:1', 'spotify:track:2']
+        assert mock_request.call_args.kwargs['params']['fields'] == 'items(track(uri))'
+
+    @patch('app.spotify_client.SpotifyClient._make_request')
+    def test_get_playlist_tracks_listing_shrinks(self, mock_request, spotify_client):
+        """Test a listing that shrinks mid-fetch returns no placeholder entries."""
+        pages = {
+            0: {'items': [{'id': 't0'}, {'id': 't1'}], 'total': 6},
+            2: {'items': [{'id': 't2'}, {'id': 't3'}], 'total': 5},
+            4: {'items': [{'id': 't4'}], 'total': 5},
+        }
+        mock_request.side_effect = lambda method, endpoint, params: pages[params['offset']]
+
+        tracks = spotify_client.get_playlist_tracks("playlist_id", limit=2)
+
+        assert [t['id'] for t in tracks] == ['t0', 't1', 't2', 't3', 't4']
+
+    @patch('app.spotify_client.SpotifyClient._make_request')
+    def test_remove_tracks_from_playlist_batches(self, mock_request, spotify_client):
+        """Test removals are deduplicated and sent in batches of 100 track objects."""
+        track_uris = [f"spotify:track:{i}" for i in range(150)] + ["spotify:track:0"]
+
+        spotify_client.remove_tracks_from_playlist("playlist_id", track_uris)
+
+        sent = [call.kwargs['json']['tracks'] for call in mock_request.call_args_list]
+        assert [len(batch) for batch in sent] == [100, 50]
+        assert sent[0][0] == {'uri': 'spotify:track:0'}
+        assert all(call.args[0] == 'DELETE' for call in mock_request.call_args_list)
+
+    def test_session_environment_resolved_per_host(self, mock_env_vars, monkeypatch):
+        """Test proxy settings are captured at startup for each host, honouring NO_PROXY."""
+        monkeypatch.setenv("HTTPS_PROXY", "http://proxy.internal:3128")
+        monkeypatch.setenv("NO_PROXY", "api.spotify.com")
+
+        client = SpotifyClient()
+
+        assert client._session.trust_env is False
+        assert client._api_env['proxies'] == {}
+        assert client._token_env['proxies'].get("https") == "http://proxy.internal:3128"
+        with patch.object(client._session, 'post') as mock_post:
+            mock_post.return_value = Mock(status_code=200, json=lambda: {
+                "access_token": "new", "expires_in": 3600
+            })
+            client._refresh_access_token()
+        assert mock_post.call_args.kwargs['proxies'] == client._token_env['proxies']
+        client.close()
+
+    @patch('app.spotify_client.SpotifyClient._make_request')
+    def test_get_tracks_batches_ids(self, mock_request, spotify_client):
+        """Test bulk track lookups send 50 IDs per call and drop unknown IDs."""
+        track_ids = [f"track{i}" for i in range(120)]
+
+        def fake_request(method, endpoint, params):
+            ids = params['ids'].split(',')
+            return {'tracks': [None if i == "track7" else {'id': i} for i in ids]}
+
+        mock_request.side_effect = fake_request
+
+        tracks = spotify_client.get_tracks(track_ids)
+
+        assert mock_request.call_count == 3
+        assert [t['id'] for t in tracks] == [i for i in track_ids if i != "track7"]
+
+    @patch('app.spotify_client.SpotifyClient._make_request')
+    def test_search_and_new_releases_cached(self, mock_request, spotify_client):
+        """Test identical searches and new release listings reuse one response."""
+        mock_request.side_effect = lambda method, endpoint, params: (
+            {'tracks': {'items': [{'id': params['q']}]}} if endpoint == '/search'
+            else {'albums': {'items': [{'id': 'album1'}]}}
+        )
+
+        assert spotify_client.search_tracks("genre:pop", limit=20) == [{'id': "genre:pop"}]
+        assert spotify_client.search_tracks("genre:pop", limit=20) == [{'id': "genre:pop"}]
+        spotify_client.search_tracks("genre:rock", limit=20)
+        spotify_client.get_new_releases()
+        spotify_client.get_new_releases()
+
+        assert mock_request.call_count == 3
+
+    @patch('app.spotify_client.SpotifyClient._make_request')
+    def test_cached_results_are_copies(self, mock_request, spotify_client):
+        """Test changes to one cached search result don't leak into the next."""
+        mock_request.return_value = {'tracks': {'items': [{'id': 'track1'}]}}
+
+        first = spotify_client.search_tracks("genre:pop", limit=20)
+        first[0]['score'] = 0.9
+        second = spotify_client.search_tracks("genre:pop", limit=20)
+
+        assert mock_request.call_count == 1
+        assert second == [{'id': 'track1'}]
+        assert second[0] is not first[0]
+
+    def test_close_closes_session(self, spotify_client):
+        """Test closing the client releases its pooled connections."""
+        with patch.object(spotify_client._session, 'close') as mock_close:
+            with spotify_client:
+                pass
+        
+        mock_close.assert_called_once()
+
+    @patch('app.spotify_client.requests.Session.request')
+    def test_update_playlist_cover_success(self, mock_request, spotify_client):
         """Test successful playlist cover update."""
-        mock_response = Mock()
+        mock_response = Mock(headers={}, content=b'')
         mock_response.status_code = 202
-        mock_put.return_value = mock_response
+        mock_request.return_value = mock_response
 
         # Mock access token
         spotify_client.access_token = "test_token"
+        spotify_client.token_expires_at = float("inf")
 
         result = spotify_client.update_playlist_cover("test_playlist_id", "base64_image_data")
         
         assert result is True
-        mock_put.assert_called_once()
+        mock_request.assert_called_once()
+        headers = mock_request.call_args.kwargs['headers']
+        assert headers['Content-Type'] == 'image/jpeg'
+        # The shared default headers are left untouched
+        assert spotify_client._get_headers()['Content-Type'] == 'application/json'
+
+    def test_user_profile_fetched_once(self, spotify_client):
+        """Test user profile is fetched lazily and cached."""
+        with patch.object(spotify_client, 'get_user_profile',
+                          return_value={"display_name": "Test User"}) as mock_profile:
+            assert spotify_client.user_profile["display_name"] == "Test User"
+            assert spotify_client.user_profile["display_name"] == "Test User"
+            mock_profile.assert_called_once()
+
+    def test_user_profile_disk_cache(self, spotify_client, mock_env_vars):
+        """Test a new client reuses the profile cached on disk until invalidated."""
+        profile = {"id": "test_user_id", "display_name": "Test User"}
+        with patch.object(SpotifyClient, 'get_user_profile', return_value=profile) as mock_profile:
+            assert spotify_client.user_profile == profile
+            assert SpotifyClient().user_profile == profile
+            mock_profile.assert_called_once()
+
+            spotify_client.invalidate_profile_cache()
+            assert spotify_client.user_profile == profile
+            assert mock_profile.call_count == 2
 
     def test_get_headers(self, spotify_client):
         """Test header generation."""
@@ -191,7 +602,7 @@ class TestSpotifyClient:
         assert headers["Authorization"] == "Bearer test_token"
         assert headers["Content-Type"] == "application/json"
 
-    @patch('app.spotify_client.requests.post')
+    @patch('app.spotify_client.requests.Session.post')
     def test_handle_rate_limit(self, mock_post, spotify_client):
         """Test rate limit handling."""
         # First call returns rate limit error
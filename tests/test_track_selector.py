@@ -325,3 +325,231 @@ class TestTrackSelector:
         assert len(filtered) == 2
         assert filtered[0]["name"] == "Pop Track"
         assert filtered[1]["name"] == "Rock Track"
+
+    def test_discovery_searches_run_concurrently_in_order(self, mock_spotify_client):
+        """Test discovery searches are gathered in query order and failures skipped."""
+        config = {"genres": {"buckets": {"Pop": ["pop", "dance-pop"], "Rock": ["rock"]}}}
+        mock_spotify_client.get_new_releases.return_value = []
+
+        def fake_search(query, limit):
+            if query.startswith("genre:dance-pop"):
+                raise Exception("API error")
+            return [{"id": query.split()[0]}]
+
+        mock_spotify_client.search_tracks.side_effect = fake_search
+        selector = TrackSelector(mock_spotify_client, config)
+
+        tracks = selector.discover_tracks_for_period('previous_week')
+        selector.close()
+
+        assert [t["id"] for t in tracks] == ["genre:pop", "genre:rock"]
+        assert mock_spotify_client.search_tracks.call_count == 3
+
+    def test_new_release_tracks_use_bulk_lookups(self, mock_spotify_client):
+        """Test new release tracks come from bulk album/track lookups, not searches."""
+        mock_spotify_client.get_new_releases.return_value = [
+            {"id": "album1", "name": "Album 1", "release_date": "2000-01-01"},
+            {"id": "album2", "name": "Album 2", "release_date": "2000-01-02"},
+        ]
+        mock_spotify_client.get_albums.return_value = [
+            {"id": "album1", "tracks": {"items": [{"id": f"a1t{i}"} for i in range(30)]}},
+            {"id": "album2", "tracks": {"items": [{"id": "a2t0"}]}},
+        ]
+        mock_spotify_client.get_tracks.side_effect = lambda ids: [{"id": i} for i in ids]
+        selector = TrackSelector(mock_spotify_client, {})
+
+        tracks = selector.discover_tracks_for_period('general')
+        selector.close()
+
+        mock_spotify_client.get_albums.assert_called_once_with(["album1", "album2"])
+        assert len(tracks) == 21  # 20 per album cap + 1
+        mock_spotify_client.search_tracks.assert_not_called()
+
+    def test_albums_since_filters_by_release_date(self, track_selector):
+        """Test albums are kept from the cutoff day on, skipping imprecise dates."""
+        from datetime import datetime
+
+        albums = [
+            {"id": "old", "release_date": "2024-05-31"},
+            {"id": "cutoff", "release_date": "2024-06-01"},
+            {"id": "new", "release_date": "2024-06-15"},
+            {"id": "year_only", "release_date": "2024"},
+            {"id": "missing"},
+        ]
+
+        recent = track_selector._albums_since(albums, datetime(2024, 6, 1))
+
+        assert [a["id"] for a in recent] == ["cutoff", "new"]
+
+    def test_calculate_track_scores_recency_by_period(self, track_selector):
+        """Test the recency boost only applies within the playlist type's window."""
+        from datetime import datetime, timedelta
+
+        def track(track_id, days_old):
+            release = (datetime.now() - timedelta(days=days_old)).strftime('%Y-%m-%d')
+            return {"id": track_id, "popularity": 50, "album": {"release_date": release}}
+
+        daily = track_selector.calculate_track_scores(
+            [track("fresh", 0), track("stale", 5)], playlist_type='daily'
+        )
+        weekly = track_selector.calculate_track_scores(
+            [track("fresh", 0), track("stale", 5)], playlist_type='weekly'
+        )
+
+        assert [t["id"] for t in daily] == ["fresh", "stale"]
+        assert daily[0]["score"] > daily[1]["score"]
+        assert weekly[0]["score"] == pytest.approx(weekly[1]["score"])
+
+    def test_calculate_track_scores_popularity_delta(self, track_selector):
+        """Test the previous snapshot's popularity feeds the delta by track ID."""
+        tracks = [
+            {"id": "rising", "popularity": 60, "album": {}},
+            {"id": "falling", "popularity": 60, "album": {}},
+            {"id": "new", "popularity": 60, "album": {}},
+        ]
+        previous_snapshot = {"tracks": [
+            {"id": "falling", "popularity": 90},
+            {"id": "rising", "popularity": 30},
+        ]}
+
+        scored = track_selector.calculate_track_scores(tracks, previous_snapshot)
+
+        assert [t["id"] for t in scored] == ["rising", "new", "falling"]
+
+    def test_dedupe_tracks_reuses_existing_ids(self, track_selector):
+        """Test the existing IDs are built once per listing and still filter correctly."""
+        existing = [{"track": {"id": "track1"}}, {"track": None}, {}]
+        tracks = [{"id": "track1"}, {"id": "track2"}]
+
+        first = track_selector.dedupe_tracks(tracks, existing, dedupe_days=7)
+        ids = track_selector._existing_ids_cache[1]
+        second = track_selector.dedupe_tracks(tracks, existing, dedupe_days=7)
+
+        assert [t["id"] for t in first] == ["track2"]
+        assert second == first
+        assert track_selector._existing_ids_cache[1] is ids
+
+        other = track_selector.dedupe_tracks(tracks, [{"track": {"id": "track2"}}], dedupe_days=7)
+        assert [t["id"] for t in other] == ["track1"]
+
+    def test_apply_genre_allocation_spreads_genres(self, track_selector):
+        """Test allocation takes each genre's best tracks, then the best of the rest."""
+        tracks = [
+            {"id": f"pop{i}", "genre": "Pop", "score": 0.9 - i * 0.01} for i in range(6)
+        ] + [
+            {"id": f"rock{i}", "genre": "Rock", "score": 0.5 - i * 0.01} for i in range(2)
+        ]
+
+        allocated = track_selector.apply_genre_allocation(tracks, target_size=5)
+
+        assert [t["id"] for t in allocated] == ["pop0", "pop1", "pop2", "rock0", "rock1"]
+
+    def test_parse_release_date_precisions(self):
+        """Test day-precision dates parse and year/month precision yield None."""
+        from datetime import datetime
+        from app.track_selector import _parse_release_date
+
+        assert _parse_release_date("2024-06-01") == datetime(2024, 6, 1)
+        assert _parse_release_date("2024-6-1") == datetime(2024, 6, 1)
+        assert _parse_release_date("2024-06") is None
+        assert _parse_release_date("2024") is None
+
+    def test_filter_tracks_fused(self, track_selector):
+        """Test popularity and explicit filters apply together in one pass."""
+        tracks = [
+            {"id": "keep", "popularity": 70, "explicit": False},
+            {"id": "unpopular", "popularity": 30, "explicit": False},
+            {"id": "explicit", "popularity": 90, "explicit": True},
+        ]
+
+        assert [t["id"] for t in track_selector._filter_tracks(tracks, 50)] == ["keep"]
+        assert [t["id"] for t in track_selector._filter_tracks(tracks, 50, allow_explicit=True)] == [
+            "keep", "explicit"
+        ]
+
+    def test_genre_queries_use_current_years(self, mock_spotify_client):
+        """Test genre searches filter on the period's years, not a fixed one."""
+        from datetime import datetime
+
+        selector = TrackSelector(mock_spotify_client, {"genres": {"buckets": {"Pop": ["pop", "k-pop"]}}})
+        selector.close()
+
+        same_year = selector._genre_queries(1, 20, datetime(2027, 3, 1), datetime(2027, 3, 9))
+        spanning = selector._genre_queries(2, 15, datetime(2026, 12, 28), datetime(2027, 1, 4))
+
+        assert same_year == [("genre:pop year:2027", 20)]
+        assert spanning == [("genre:pop year:2026-2027", 15), ("genre:k-pop year:2026-2027", 15)]
+
+    def test_discover_all_periods_shares_requests(self, mock_spotify_client):
+        """Test periods share one new releases call and one search per query."""
+        config = {"genres": {"buckets": {"Pop": ["pop"]}}}
+        mock_spotify_client.get_new_releases.return_value = []
+        mock_spotify_client.search_tracks.side_effect = lambda query, limit: [
+            {"id": f"t{i}"} for i in range(limit)
+        ]
+        selector = TrackSelector(mock_spotify_client, config)
+
+        discovered = selector.discover_tracks_for_all_periods(
+            {'month_to_date': 100, 'year_to_date': 100}
+        )
+        selector.close()
+
+        mock_spotify_client.get_new_releases.assert_called_once()
+        mock_spotify_client.search_tracks.assert_called_once()
+        assert mock_spotify_client.search_tracks.call_args.kwargs['limit'] == 30
+        assert len(discovered['month_to_date']) == 25
+        assert len(discovered['year_to_date']) == 30
+
+    def test_discover_all_periods_scores_independently(self, mock_spotify_client):
+        """Test scoring one period's tracks leaves another period's scores alone."""
+        config = {"genres": {"buckets": {"Pop": ["pop"]}}}
+        mock_spotify_client.get_new_releases.return_value = []
+        mock_spotify_client.search_tracks.side_effect = lambda query, limit: [
+            {"id": f"t{i}", "popularity": 50, "album": {"release_date": "2000-01-01"}}
+            for i in range(limit)
+        ]
+        selector = TrackSelector(mock_spotify_client, config)
+
+        discovered = selector.discover_tracks_for_all_periods(
+            {'month_to_date': 100, 'year_to_date': 100}
+        )
+        selector.close()
+        monthly = selector.calculate_track_scores(discovered['month_to_date'], playlist_type='monthly')
+        before = [t['score'] for t in monthly]
+        selector.calculate_track_scores(
+            discovered['year_to_date'], previous_snapshot={"tracks": [{"id": "t0", "popularity": 0}]},
+            playlist_type='yearly'
+        )
+
+        assert [t['score'] for t in monthly] == before
+        assert discovered['month_to_date'][0] is not discovered['year_to_date'][0]
+
+    def test_select_tracks_duplicates_do_not_use_artist_cap(self, track_selector):
+        """Test a track found twice counts once against its artist's cap."""
+        track_selector.config["artist_caps"]["playlist2"] = 2
+        results = {
+            "Artist 3": [
+                {"id": "a", "artists": [{"name": "Artist 3"}], "popularity": 90},
+                {"id": "a", "artists": [{"name": "Artist 3"}], "popularity": 90},
+                {"id": "b", "artists": [{"name": "Artist 3"}], "popularity": 80},
+                {"id": "c", "artists": [{"name": "Artist 3"}], "popularity": 10},
+            ]
+        }
+
+        with patch.object(track_selector, '_search_tracks_by_artist',
+                          side_effect=lambda artist, limit: results[artist]):
+            selected = track_selector.select_tracks_for_playlist("playlist2", 10)
+
+        assert [t["id"] for t in selected] == ["a", "b"]
+
+    def test_randomize_selection_samples_from_generator(self, track_selector):
+        """Test reservoir sampling accepts a generator and returns distinct tracks."""
+        tracks = ({"id": f"track{i}"} for i in range(50))
+
+        selected = track_selector._randomize_selection(tracks, 5)
+
+        assert len(selected) == 5
+        assert len({t["id"] for t in selected}) == 5
+
+        few = [{"id": "a"}, {"id": "b"}]
+        assert track_selector._randomize_selection(few, 5) == few
@@ -570,9 +570,8 @@ class SpotifyCLI:
         
         try:
             # Import and run the update
-            from app.main import SpotifyBot
-            bot = SpotifyBot()
-            bot.run_manual_update(playlist_type)
+            from app.main import get_bot
+            get_bot().run_manual_update(playlist_type)
             print(f"✅ {playlist_type} updated successfully")
             return True
             
@@ -72,11 +72,27 @@ def get_bot_stats():
     # =============================================================================
     # Get the last 10 playlist snapshots
     # Snapshots are saved copies of playlist data for analysis
+    # Newer snapshots keep one row per track in snapshot_tracks (and leave
+    # tracks_data empty), so their track list is rebuilt here as JSON
     
     snapshots_df = pd.read_sql_query("""
-        SELECT playlist_type, snapshot_date, tracks_data
-        FROM playlist_snapshots 
-        ORDER BY snapshot_date DESC 
+        SELECT s.playlist_type, s.snapshot_date,
+               COALESCE(NULLIF(s.tracks_data, ''), (
+                   SELECT json_group_array(json_object(
+                       'id', t.track_id,
+                       'uri', t.track_uri,
+                       'name', t.track_name,
+                       'artists', json(t.artist_names),
+                       'album', t.album_name,
+                       'release_date', t.release_date,
+                       'popularity', t.popularity
+                   ))
+                   FROM (SELECT * FROM snapshot_tracks
+                         WHERE snapshot_id = s.id
+                         ORDER BY position) AS t
+               ), '[]') AS tracks_data
+        FROM playlist_snapshots AS s
+        ORDER BY s.snapshot_date DESC 
         LIMIT 10
     """, conn)
     